@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+class ResponseCache:
+    """
+    An on-disk cache of scraped pages, keyed by URL.
+
+    Entries keep the validators needed for conditional requests (ETag and
+    Last-Modified), a hash of the last body, and the price parsed from it,
+    but not the body itself. A 304 or an identical body can then be answered
+    from the entry without parsing any HTML. Entries are written atomically,
+    one file per URL, so scraper threads can share one cache.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+    def get(self, url):
+        try:
+            with open(self._path(url), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def put(self, url, **fields):
+        entry = dict(fields, url=url, stored_at=time.time())
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(url))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
@@ -0,0 +1,93 @@
+import json
+import os
+import time
+import tracemalloc
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from compare.price_parser import STRATEGIES, available_parsers, parse_price
+from compare.replay import fixture_name
+from compare.scraper import DEFAULT_HEADERS, DEFAULT_TIMEOUT
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks price extraction strategies against saved product pages, one per site in products_to_scrape.json'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixtures-dir', default=os.path.join(settings.BASE_DIR, 'compare', 'scrape_fixtures'),
+                            help='Directory holding one saved page per site.')
+        parser.add_argument('--fetch', action='store_true', help='Download a page for each site into the fixtures directory first.')
+        parser.add_argument('--iterations', type=int, default=20, help='Times each page is parsed per strategy.')
+
+    def handle(self, *args, **options):
+        products_json_path = os.path.join(settings.BASE_DIR, 'dashboard/static', 'data', 'products_to_scrape.json')
+        with open(products_json_path, 'r') as f:
+            products = json.load(f)
+
+        # One page per site is enough: every page of a site shares its layout and selector
+        sites = {}
+        for product in products:
+            for url_info in product['urls']:
+                sites.setdefault(url_info['site'], url_info)
+
+        fixtures_dir = options['fixtures_dir']
+        if options['fetch']:
+            self.fetch_fixtures(sites, fixtures_dir)
+
+        pages = []
+        for site, url_info in sites.items():
+            path = os.path.join(fixtures_dir, fixture_name(site))
+            if not os.path.exists(path):
+                self.stdout.write(self.style.WARNING(f"No saved page for {site} at {path}; skipping."))
+                continue
+            with open(path, 'rb') as f:
+                pages.append((site, url_info['price_selector'], f.read()))
+        if not pages:
+            raise CommandError(f"No saved pages in {fixtures_dir}. Run with --fetch to download them.")
+
+        iterations = options['iterations']
+        total_kib = sum(len(content) for _, _, content in pages) / 1024
+        self.stdout.write(f"{len(pages)} pages ({total_kib:.0f} KiB), {iterations} iterations each\n")
+
+        baseline = {site: parse_price(content, selector, site, strategy='full') for site, selector, content in pages}
+        for parser in available_parsers():
+            for strategy in STRATEGIES:
+                self.benchmark(pages, parser, strategy, iterations, baseline)
+
+    def fetch_fixtures(self, sites, fixtures_dir):
+        os.makedirs(fixtures_dir, exist_ok=True)
+        for site, url_info in sites.items():
+            try:
+                response = requests.get(url_info['url'], headers=DEFAULT_HEADERS, timeout=DEFAULT_TIMEOUT)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                self.stdout.write(self.style.ERROR(f"Could not fetch a page for {site}: {e}"))
+                continue
+            with open(os.path.join(fixtures_dir, fixture_name(site)), 'wb') as f:
+                f.write(response.content)
+            self.stdout.write(self.style.SUCCESS(f"Saved {site} ({len(response.content) / 1024:.0f} KiB)"))
+
+    def benchmark(self, pages, parser, strategy, iterations, baseline):
+        mismatches = set()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for site, selector, content in pages:
+                if parse_price(content, selector, site, strategy=strategy, parser=parser) != baseline[site]:
+                    mismatches.add(site)
+        elapsed = time.perf_counter() - started
+
+        # Tracing slows parsing down many times over, so peak memory gets its own pass
+        tracemalloc.start()
+        for site, selector, content in pages:
+            parse_price(content, selector, site, strategy=strategy, parser=parser)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        pages_per_second = iterations * len(pages) / elapsed
+        line = f"{parser:<12} {strategy:<9} {pages_per_second:8.1f} pages/s  peak {peak / 1024 / 1024:6.2f} MiB"
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f"{line}  (differs from full parse for {', '.join(sorted(mismatches))})"))
+        else:
+            self.stdout.write(line)
@@ -0,0 +1,106 @@
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from compare.replay import ReplayServer, fixture_name
+from compare.scraper import DEFAULT_PER_HOST, DEFAULT_WORKERS, ScrapeTarget, ScraperEngine
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Drives the scraper against local replays of saved product pages and reports throughput and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixtures-dir', default=os.path.join(settings.BASE_DIR, 'compare', 'scrape_fixtures'),
+                            help='Directory holding one saved page per site.')
+        parser.add_argument('--pages', type=int, default=200, help='Pages to scrape, spread evenly over the sites.')
+        parser.add_argument('--latency', type=float, default=0.1, help='Seconds every replayed response waits.')
+        parser.add_argument('--jitter', type=float, default=0.1, help='Up to this many extra seconds per response.')
+        parser.add_argument('--error-rate', type=float, default=0.02, help='Share of requests answered with a 503.')
+        parser.add_argument('--slow-rate', type=float, default=0.01, help='Share of requests that stall for --slow-delay.')
+        parser.add_argument('--slow-delay', type=float, default=30.0, help='Seconds a stalled request waits.')
+        parser.add_argument('--seed', type=int, help='Seed for the injected latency and errors.')
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Pages fetched concurrently in total.')
+        parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, help='Pages fetched concurrently from one site.')
+        parser.add_argument('--delay', type=float, default=0.0, help='Seconds between request starts to one site.')
+        parser.add_argument('--timeout', type=float, default=5.0, help='Seconds to wait for a page before giving up.')
+
+    def handle(self, *args, **options):
+        products_json_path = os.path.join(settings.BASE_DIR, 'dashboard/static', 'data', 'products_to_scrape.json')
+        with open(products_json_path, 'r') as f:
+            products = json.load(f)
+
+        sites = {}
+        for product in products:
+            for url_info in product['urls']:
+                path = os.path.join(options['fixtures_dir'], fixture_name(url_info['site']))
+                if url_info['site'] not in sites and os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        sites[url_info['site']] = (product, url_info['price_selector'], f.read())
+        if not sites:
+            raise CommandError(
+                f"No saved pages in {options['fixtures_dir']}. Run benchmark_price_parser --fetch to download them."
+            )
+
+        with ExitStack() as stack:
+            servers = {
+                site: stack.enter_context(ReplayServer(
+                    content,
+                    latency=options['latency'],
+                    jitter=options['jitter'],
+                    error_rate=options['error_rate'],
+                    slow_rate=options['slow_rate'],
+                    slow_delay=options['slow_delay'],
+                    seed=options['seed'],
+                ))
+                for site, (_, _, content) in sites.items()
+            }
+            site_names = list(sites)
+            targets = []
+            for i in range(options['pages']):
+                site = site_names[i % len(site_names)]
+                product, selector, _ = sites[site]
+                targets.append(ScrapeTarget(product, site, f'{servers[site].url}/p/{i}', selector))
+
+            engine = ScraperEngine(
+                workers=options['workers'],
+                per_host=options['per_host'],
+                delay=options['delay'],
+                timeout=(min(5, options['timeout']), options['timeout']),
+            )
+            started = time.perf_counter()
+            try:
+                results = list(engine.run(targets))
+            finally:
+                engine.close()
+            elapsed = time.perf_counter() - started
+
+        by_site = defaultdict(list)
+        for result in results:
+            by_site[result.target.site].append(result)
+
+        failed = sum(1 for result in results if not result.ok)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} pages in {elapsed:.1f}s: {len(results) / elapsed:.1f} URLs/s, {failed} failed"
+        ))
+        for site, site_results in sorted(by_site.items()):
+            # Time on the wire only: queueing for a host slot is the throttle's doing, not the site's
+            latencies = [result.fetch_elapsed for result in site_results]
+            parsed = [result.parse_elapsed for result in site_results if result.error is None]
+            parse_ms = 1000 * sum(parsed) / len(parsed) if parsed else 0.0
+            self.stdout.write(
+                f"  {site:<12} {len(site_results):5d} pages  "
+                f"p50 {1000 * percentile(latencies, 0.5):7.0f} ms  p95 {1000 * percentile(latencies, 0.95):7.0f} ms  "
+                f"parse {parse_ms:6.1f} ms/page  "
+                f"{sum(1 for result in site_results if not result.ok)} failed"
+            )
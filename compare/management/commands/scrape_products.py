@@ -1,12 +1,17 @@
 import requests
-from bs4 import BeautifulSoup
 from django.core.management.base import BaseCommand
-from compare.models import SavedComparison, ComparisonItem
+from compare.http_cache import ResponseCache
+from compare.scrape_schedule import ScrapeScheduler
+from compare.scrape_writer import ScrapeWriter
+from compare.scraper import (
+    DEFAULT_DELAY, DEFAULT_PER_HOST, DEFAULT_WORKERS, ScrapeTarget, ScraperEngine,
+)
 from django.contrib.auth.models import User
 import http.client
 import json
 import os
-import re
+import time
+from collections import Counter
 from django.conf import settings
 
 # --- Advanced Scraping Patch ---
@@ -18,6 +23,15 @@ http.client._MAXHEADERS = 1000
 class Command(BaseCommand):
     help = 'Scrapes multiple products from a JSON file and saves them to the database'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Pages fetched concurrently in total.')
+        parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, help='Pages fetched concurrently from one site.')
+        parser.add_argument('--delay', type=float, default=DEFAULT_DELAY, help='Seconds between request starts to one site.')
+        parser.add_argument('--timeout', type=float, default=20, help='Seconds to wait for a page before giving up.')
+        parser.add_argument('--cache-dir', default=settings.SCRAPE_CACHE_DIR, help='Directory of the conditional-request response cache.')
+        parser.add_argument('--budget', type=int, help='Most pages to scrape this run, highest priority first. Defaults to every page not backing off.')
+        parser.add_argument('--no-cache', action='store_true', help='Download and parse every page in full.')
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS("--- Starting the Product Scraping Process ---"))
 
@@ -35,69 +49,65 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR("CRITICAL: No users found in the database. Please create a user first."))
             return
 
-        # Loop through each product in the JSON file
-        for product_data in products_to_scrape:
-            product_name = product_data['name']
-            self.stdout.write(f"\nProcessing product: '{product_name}'")
-
-            # Create a new comparison object for this product
-            comparison, created = SavedComparison.objects.update_or_create(
-                name=product_name,
-                defaults={'user': user, 'category': product_data.get('category', 'default')}
-            )
-            comparison.items.all().delete()
+        # Find or create the comparison object for each product before fetching anything
+        writer = ScrapeWriter(user, products_to_scrape)
+        writer.prepare()
 
-            # Scrape each URL for the current product
-            for url_info in product_data['urls']:
-                self.scrape_site(
-                    comparison=comparison,
-                    product_info=product_data,
-                    url=url_info['url'],
-                    site_name=url_info['site'],
-                    price_selector=url_info['price_selector']
-                )
+        engine = ScraperEngine(
+            workers=options['workers'],
+            per_host=options['per_host'],
+            delay=options['delay'],
+            timeout=(min(5, options['timeout']), options['timeout']),
+            cache=None if options['no_cache'] else ResponseCache(options['cache_dir']),
+        )
+        all_targets = ScrapeTarget.from_products(products_to_scrape)
+        scheduler = ScrapeScheduler(all_targets)
+        targets = scheduler.plan(options['budget'])
+        self.stdout.write(f"Scheduled {len(targets)} of {len(all_targets)} pages.")
+        results = []
+        started = time.perf_counter()
+        cache_counts = Counter()
+        downloaded = 0
+        try:
+            # Pages are fetched on worker threads; results are written here, on the command's own DB connection
+            for result in engine.run(targets):
+                cache_counts[result.cache_status] += 1
+                downloaded += result.downloaded
+                self.report_result(result)
+                writer.add(result)
+                results.append(result)
+        finally:
+            engine.close()
+        counts = writer.flush()
+        price_changes = scheduler.record(results)
 
-        self.stdout.write(self.style.SUCCESS("\n--- Scraping process completed! ---"))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"\n--- Scraping process completed! {len(targets)} pages in {elapsed:.1f}s ---"))
+        self.stdout.write(
+            f"Items: {counts['created']} created, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['retired']} retired; {price_changes} price changes."
+        )
+        if engine.cache is not None:
+            self.stdout.write(
+                f"Cache: {cache_counts['not_modified']} not modified, {cache_counts['unchanged']} unchanged, "
+                f"{cache_counts['miss']} parsed; {downloaded / 1024:.0f} KiB downloaded."
+            )
 
-    def scrape_site(self, comparison, product_info, url, site_name, price_selector):
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        
-        try:
-            with requests.Session() as s:
-                s.headers.update(headers)
-                response = s.get(url)
-                response.raise_for_status()
+    def report_result(self, result):
+        target = result.target
+        site_name = target.site
+        product_info = target.product
 
-            soup = BeautifulSoup(response.content, "html.parser")
-            price_element = soup.select_one(price_selector)
-            
-            if price_element:
-                price_text = price_element.text.strip()
-                # Use a regular expression to find the first number in the string
-                match = re.search(r'\d[\d,.]*\d', price_text)
-                if match:
-                    cleaned_price = match.group(0).replace(',', '')
-                    price = float(cleaned_price)
-                    
-                    ComparisonItem.objects.create(
-                        comparison=comparison,
-                        product_id=f"{site_name.lower()}_{comparison.id}",
-                        name=product_info['name'],
-                        brand=product_info['brand'],
-                        price=price,
-                        image=product_info['image'],
-                        site=site_name,
-                        url=url
-                    )
-                    self.stdout.write(self.style.SUCCESS(f"  - [SUCCESS] Scraped {site_name}: ₹{price}"))
-                else:
-                    self.stdout.write(self.style.WARNING(f"  - [WARNING] Found the price element, but could not extract a number from the text: '{price_text}'"))
+        if result.error is not None:
+            if isinstance(result.error, requests.exceptions.RequestException):
+                self.stdout.write(self.style.ERROR(f"  - [FAILED] Could not fetch page for {site_name}. URL may be invalid or the site may be blocking requests. Error: {result.error}"))
             else:
-                self.stdout.write(self.style.WARNING(f"  - [WARNING] Could not find the price element for {site_name} using selector '{price_selector}'. The site's layout may have changed."))
+                self.stdout.write(self.style.ERROR(f"  - [FAILED] An unexpected error occurred while scraping {site_name}: {result.error}"))
+            return
 
-        except requests.exceptions.RequestException as e:
-            self.stdout.write(self.style.ERROR(f"  - [FAILED] Could not fetch page for {site_name}. URL may be invalid or the site may be blocking requests. Error: {e}"))
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"  - [FAILED] An unexpected error occurred while scraping {site_name}: {e}"))
+        if result.price is not None:
+            self.stdout.write(self.style.SUCCESS(f"  - [SUCCESS] Scraped {site_name} for '{product_info['name']}': ₹{result.price} ({result.elapsed:.2f}s)"))
+        elif result.price_text is not None:
+            self.stdout.write(self.style.WARNING(f"  - [WARNING] Found the price element, but could not extract a number from the text: '{result.price_text}'"))
+        else:
+            self.stdout.write(self.style.WARNING(f"  - [WARNING] Could not find the price element for {site_name} using selector '{target.price_selector}'. The site's layout may have changed."))
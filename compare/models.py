@@ -23,3 +23,20 @@ class ComparisonItem(models.Model):
 
     def __str__(self):
         return self.name
+
+class ScrapeState(models.Model):
+    """Scheduling state of one scraped URL: when it was last fetched, how often its price moves, and any backoff."""
+    url = models.URLField(max_length=500, unique=True)
+    site = models.CharField(max_length=50)
+    # The catalog product whose demand decides how often the URL is scraped, when one matches
+    product = models.ForeignKey('dashboard.Product', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    last_scraped_at = models.DateTimeField(null=True, blank=True)
+    last_changed_at = models.DateTimeField(null=True, blank=True)
+    scrape_count = models.PositiveIntegerField(default=0)
+    change_count = models.PositiveIntegerField(default=0)
+    failure_count = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.url
@@ -0,0 +1,78 @@
+import re
+from functools import lru_cache
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+
+DEFAULT_PRICE_PATTERN = r'\d[\d,.]*\d'
+# Sites whose price text needs a stricter pattern than the default
+SITE_PRICE_PATTERNS = {}
+
+DEFAULT_PARSER = 'html.parser'
+DEFAULT_STRATEGY = 'strained'
+STRATEGIES = ('full', 'compiled', 'strained')
+
+# A selector made of one compound: an optional tag plus ids and classes, e.g. "span.price" or ".css-1d0jf8e"
+_SIMPLE_SELECTOR_RE = re.compile(r'^(?P<tag>[A-Za-z][\w-]*)?(?P<rest>(?:[.#][\w-]+)*)$')
+
+
+def available_parsers():
+    """The tree builders usable here; lxml is optional and faster when installed."""
+    return [name for name in ('html.parser', 'lxml') if builder_registry.lookup(name) is not None]
+
+
+@lru_cache(maxsize=256)
+def compile_selector(selector):
+    return soupsieve.compile(selector)
+
+
+@lru_cache(maxsize=64)
+def price_pattern(site):
+    return re.compile(SITE_PRICE_PATTERNS.get(site, DEFAULT_PRICE_PATTERN))
+
+
+@lru_cache(maxsize=256)
+def selector_strainer(selector):
+    """
+    A SoupStrainer keeping only the elements that can match `selector`, or None.
+
+    Only single-compound selectors are strained: with combinators the match
+    depends on ancestors, which a strained tree does not keep. The strainer
+    tests one necessary condition (the id, else the first class, else the tag),
+    and the full selector is still applied to what it keeps.
+    """
+    match = _SIMPLE_SELECTOR_RE.match(selector.strip())
+    if not match or not (match.group('tag') or match.group('rest')):
+        return None
+    tokens = re.findall(r'([.#])([\w-]+)', match.group('rest'))
+    ids = [value for kind, value in tokens if kind == '#']
+    classes = [value for kind, value in tokens if kind == '.']
+    if ids:
+        return SoupStrainer(id=ids[0])
+    if classes:
+        # While parsing, the strainer sees the raw class attribute, so match one whitespace-separated name
+        return SoupStrainer(class_=re.compile(r'(?:^|\s)%s(?:\s|$)' % re.escape(classes[0])))
+    return SoupStrainer(match.group('tag'))
+
+
+def extract_price_text(content, price_selector, strategy=DEFAULT_STRATEGY, parser=DEFAULT_PARSER):
+    """Returns the stripped text of the first element matching `price_selector`, or None."""
+    if strategy == 'full':
+        element = BeautifulSoup(content, parser).select_one(price_selector)
+    else:
+        strainer = selector_strainer(price_selector) if strategy == 'strained' else None
+        soup = BeautifulSoup(content, parser, parse_only=strainer)
+        element = compile_selector(price_selector).select_one(soup)
+    return None if element is None else element.text.strip()
+
+
+def parse_price(content, price_selector, site=None, strategy=DEFAULT_STRATEGY, parser=DEFAULT_PARSER):
+    """Returns (price, element text) from a product page; either may be None."""
+    price_text = extract_price_text(content, price_selector, strategy, parser)
+    if price_text is None:
+        return None, None
+    match = price_pattern(site).search(price_text)
+    if not match:
+        return None, price_text
+    return float(match.group(0).replace(',', '')), price_text
@@ -0,0 +1,98 @@
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fixture_name(site):
+    """The file a site's saved product page is kept under in a fixtures directory."""
+    return re.sub(r'[^\w-]+', '_', site.lower()) + '.html'
+
+
+class ReplayServer:
+    """
+    A local HTTP stand-in for one shopping site, serving a saved page for every path.
+
+    Each response waits `latency` seconds, plus up to `jitter` more. A share
+    `error_rate` of requests gets a 503 instead of the page, and a share
+    `slow_rate` stalls for `slow_delay` seconds first, long enough to hit the
+    scraper's timeouts. Every server listens on its own port, so the scraper
+    treats each site as a separate host, as it would live.
+    """
+
+    def __init__(self, content, latency=0.0, jitter=0.0, error_rate=0.0, slow_rate=0.0, slow_delay=30.0, seed=None):
+        self.content = content
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def _plan(self):
+        """Returns (seconds to wait, whether to fail) for one request."""
+        with self._lock:
+            roll = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if roll < self.error_rate:
+            return delay, True
+        if roll < self.error_rate + self.slow_rate:
+            return delay + self.slow_delay, False
+        return delay, False
+
+    def _handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out as separate writes; with Nagle on, delayed ACKs add ~40 ms to each response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                delay, fail = replay._plan()
+                time.sleep(delay)
+                status, body = (503, b'Service Unavailable') if fail else (200, replay.content)
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The scraper gave up on a slow response
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._server.block_on_close = False
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count
+from django.utils import timezone
+
+from dashboard.models import CartItem, PriceAlert, Product, ProductOffer, Wishlist
+
+from .models import ScrapeState
+
+# How much one active alert, wishlist entry or cart line adds to a product's demand
+DEMAND_WEIGHTS = {'alerts': 3, 'wishlist': 1, 'cart': 2}
+FAILURE_BASE_DELAY = 15 * 60
+FAILURE_MAX_DELAY = 24 * 60 * 60
+
+_CENT = Decimal('0.01')
+
+
+def failure_delay(failures):
+    """Seconds to wait before scraping a failing URL again, doubling after every failure."""
+    return min(FAILURE_BASE_DELAY * 2 ** (failures - 1), FAILURE_MAX_DELAY)
+
+
+def volatility(state):
+    """The share of scrapes that found a new price, smoothed so URLs with little history start at one half."""
+    return (state.change_count + 1) / (state.scrape_count + 2)
+
+
+def product_demand(product_ids):
+    """Weighted active alert, wishlist and cart counts per product, in one grouped query each."""
+    sources = {
+        'alerts': (PriceAlert.objects.filter(is_active=True), 'product_id'),
+        'wishlist': (Wishlist.objects.all(), 'product_id'),
+        'cart': (CartItem.objects.all(), 'product_offer__product_id'),
+    }
+    demand = dict.fromkeys(product_ids, 0)
+    for source, (queryset, product_field) in sources.items():
+        counts = (
+            queryset.filter(**{f'{product_field}__in': product_ids})
+            .order_by()
+            .values_list(product_field)
+            .annotate(n=Count('*'))
+        )
+        for product_id, n in counts:
+            demand[product_id] += DEMAND_WEIGHTS[source] * n
+    return demand
+
+
+class ScrapeScheduler:
+    """
+    Decides which product pages a scrape run fetches, and in what order.
+
+    Every URL keeps its scrape state. A run skips URLs that are backing off
+    after failures and orders the rest by priority: the demand for the product
+    (alerts, wishlists and carts), how often its price has changed, and how
+    long ago it was last scraped. A fixed budget of pages per run then goes to
+    the prices that people watch and that actually move.
+    """
+
+    def __init__(self, targets, now=None):
+        self.targets = targets
+        self.now = now or timezone.now()
+        self.states = {}
+
+    def sync(self):
+        """Loads the state of every target URL, creating it for new URLs and linking URLs to catalog products."""
+        urls = {target.url: target for target in self.targets}
+        ScrapeState.objects.bulk_create(
+            [ScrapeState(url=url, site=target.site) for url, target in urls.items()], ignore_conflicts=True,
+        )
+        self.states = {state.url: state for state in ScrapeState.objects.filter(url__in=urls)}
+
+        unlinked = [state for state in self.states.values() if state.product_id is None]
+        if unlinked:
+            by_url = dict(
+                ProductOffer.objects.filter(url__in=[state.url for state in unlinked]).values_list('url', 'product_id')
+            )
+            names = {urls[state.url].product['name'] for state in unlinked}
+            by_name = dict(Product.objects.filter(name__in=names).order_by('-id').values_list('name', 'id'))
+            linked = []
+            for state in unlinked:
+                state.product_id = by_url.get(state.url) or by_name.get(urls[state.url].product['name'])
+                if state.product_id is not None:
+                    linked.append(state)
+            ScrapeState.objects.bulk_update(linked, ['product'])
+
+    def plan(self, budget=None):
+        """Returns the targets to scrape this run, highest priority first, at most `budget` of them."""
+        if not self.states:
+            self.sync()
+        demand = product_demand({state.product_id for state in self.states.values() if state.product_id})
+
+        def priority(target):
+            state = self.states[target.url]
+            wanted = demand.get(state.product_id, 0)
+            if state.last_scraped_at is None:
+                return (float('inf'), wanted)
+            staleness = (self.now - state.last_scraped_at).total_seconds() / 3600
+            return ((1 + wanted) * volatility(state) * staleness, wanted)
+
+        due = [
+            target for target in self.targets
+            if self.states[target.url].next_attempt_at is None or self.states[target.url].next_attempt_at <= self.now
+        ]
+        due.sort(key=priority, reverse=True)
+        return due if budget is None else due[:budget]
+
+    def record(self, results):
+        """Updates the state of every scraped URL from its result. Returns the number of price changes seen."""
+        changed = 0
+        updated = []
+        for result in results:
+            state = self.states[result.target.url]
+            if result.ok:
+                price = Decimal(str(result.price)).quantize(_CENT)
+                if state.last_price is not None and state.last_price != price:
+                    state.change_count += 1
+                    state.last_changed_at = self.now
+                    changed += 1
+                state.last_price = price
+                state.last_scraped_at = self.now
+                state.scrape_count += 1
+                state.failure_count = 0
+                state.next_attempt_at = None
+            else:
+                state.failure_count += 1
+                state.next_attempt_at = self.now + timedelta(seconds=failure_delay(state.failure_count))
+            updated.append(state)
+        ScrapeState.objects.bulk_update(updated, [
+            'last_price', 'last_scraped_at', 'last_changed_at', 'scrape_count',
+            'change_count', 'failure_count', 'next_attempt_at',
+        ])
+        return changed
@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import SavedComparison, ComparisonItem
+
+_CENT = Decimal('0.01')
+UPDATE_FIELDS = ['price', 'url', 'name', 'brand', 'image', 'product_id']
+
+
+class ScrapeWriter:
+    """
+    Writes scraped prices to comparison items, touching only rows that changed.
+
+    Items are matched to results by (comparison, site). Changed items are
+    bulk-updated, new sites bulk-created, and items for sites no longer listed
+    for a product are retired. A site that failed to scrape this run keeps its
+    last known price.
+    """
+
+    def __init__(self, user, products):
+        self.user = user
+        self.products = {product['name']: product for product in products}
+        self.comparisons = {}
+        self._scraped = {}
+
+    def prepare(self):
+        """Finds or creates one comparison per product, in a constant number of queries."""
+        names = list(self.products)
+        comparisons = SavedComparison.objects.filter(name__in=names).order_by('id')
+        comparisons.exclude(user=self.user).update(user=self.user)
+        for comparison in comparisons:
+            self.comparisons.setdefault(comparison.name, comparison)
+        missing = [SavedComparison(name=name, user=self.user) for name in names if name not in self.comparisons]
+        for comparison in SavedComparison.objects.bulk_create(missing):
+            self.comparisons[comparison.name] = comparison
+
+    def add(self, result):
+        """Records a successful scrape result for writing."""
+        if result.price is None:
+            return
+        comparison = self.comparisons[result.target.product['name']]
+        self._scraped[(comparison.id, result.target.site)] = result
+
+    def _item_values(self, comparison, result):
+        product_info = result.target.product
+        return {
+            'product_id': f"{result.target.site.lower()}_{comparison.id}",
+            'name': product_info['name'],
+            'brand': product_info['brand'],
+            'price': Decimal(str(result.price)).quantize(_CENT),
+            'image': product_info['image'],
+            'url': result.target.url,
+        }
+
+    def flush(self):
+        """Writes the recorded results. Returns counts of created, updated, unchanged and retired items."""
+        by_id = {comparison.id: comparison for comparison in self.comparisons.values()}
+        listed_sites = {
+            (comparison.id, url_info['site'])
+            for name, comparison in self.comparisons.items()
+            for url_info in self.products[name]['urls']
+        }
+
+        existing = {}
+        retired = []
+        for item in ComparisonItem.objects.filter(comparison_id__in=by_id).order_by('id'):
+            key = (item.comparison_id, item.site)
+            if key not in listed_sites or key in existing:
+                retired.append(item.id)
+            else:
+                existing[key] = item
+
+        created, updated = [], []
+        unchanged = 0
+        for key, result in self._scraped.items():
+            values = self._item_values(by_id[key[0]], result)
+            item = existing.get(key)
+            if item is None:
+                created.append(ComparisonItem(comparison_id=key[0], site=key[1], **values))
+            elif any(getattr(item, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(item, field, value)
+                updated.append(item)
+            else:
+                unchanged += 1
+
+        with transaction.atomic():
+            ComparisonItem.objects.filter(id__in=retired).delete()
+            ComparisonItem.objects.bulk_create(created)
+            ComparisonItem.objects.bulk_update(updated, UPDATE_FIELDS)
+        self._scraped = {}
+        return {'created': len(created), 'updated': len(updated), 'unchanged': unchanged, 'retired': len(retired)}
@@ -0,0 +1,197 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .http_cache import content_hash
+from .price_parser import parse_price
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 20)
+DEFAULT_WORKERS = 16
+DEFAULT_PER_HOST = 2
+DEFAULT_DELAY = 1.0
+
+class ScrapeTarget:
+    """One product page to scrape: the product entry from products_to_scrape.json and one of its URLs."""
+
+    def __init__(self, product, site, url, price_selector):
+        self.product = product
+        self.site = site
+        self.url = url
+        self.price_selector = price_selector
+
+    @property
+    def host(self):
+        return urlsplit(self.url).netloc.lower()
+
+    @classmethod
+    def from_products(cls, products):
+        return [
+            cls(product, url_info['site'], url_info['url'], url_info['price_selector'])
+            for product in products
+            for url_info in product['urls']
+        ]
+
+
+class ScrapeResult:
+    def __init__(self, target, price=None, price_text=None, error=None, elapsed=0.0, cache_status=None, downloaded=0,
+                 parse_elapsed=0.0, fetch_elapsed=0.0):
+        self.target = target
+        self.price = price
+        # Set when the price element was found but held no number
+        self.price_text = price_text
+        self.error = error
+        self.elapsed = elapsed
+        # None without a cache, else 'miss', 'not_modified' (304) or 'unchanged' (same body hash)
+        self.cache_status = cache_status
+        self.downloaded = downloaded
+        # Seconds of `elapsed` spent parsing HTML rather than waiting on the network
+        self.parse_elapsed = parse_elapsed
+        # Seconds from getting a slot with the host to having the response, without the queue wait in `elapsed`
+        self.fetch_elapsed = fetch_elapsed
+
+    @property
+    def ok(self):
+        return self.price is not None
+
+
+class HostThrottle:
+    """Caps the requests in flight to one host and spaces out their start times."""
+
+    def __init__(self, concurrency, delay):
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._delay = delay
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    @contextmanager
+    def slot(self):
+        with self._slots:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start)
+                self._next_start = start + self._delay
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+class ScraperEngine:
+    """
+    Fetches and parses product pages concurrently.
+
+    Each host gets one pooled keep-alive session and a throttle, so a run
+    takes about as long as the slowest site's queue rather than the sum of
+    every request, without hammering any single site. Every request has a
+    timeout, so one hanging site cannot stall the run.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, delay=DEFAULT_DELAY,
+                 timeout=DEFAULT_TIMEOUT, headers=None, cache=None):
+        self.workers = workers
+        self.per_host = per_host
+        self.delay = delay
+        self.timeout = timeout
+        self.headers = headers or DEFAULT_HEADERS
+        self.cache = cache
+        self._sessions = {}
+        self._throttles = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _host_state(self, host):
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+                self._throttles[host] = HostThrottle(self.per_host, self.delay)
+            return self._sessions[host], self._throttles[host]
+
+    def fetch(self, target, headers=None):
+        session, throttle = self._host_state(target.host)
+        with throttle.slot():
+            fetch_started = time.perf_counter()
+            try:
+                response = session.get(target.url, headers=headers, timeout=self.timeout)
+            finally:
+                self._local.fetch_elapsed = time.perf_counter() - fetch_started
+        response.raise_for_status()
+        return response
+
+    def _scrape_cached(self, target):
+        entry = self.cache.get(target.url)
+        # A cached parse is only valid for the selector it was made with
+        if entry and entry.get('price_selector') != target.price_selector:
+            entry = None
+
+        response = self.fetch(target, headers=self.cache.conditional_headers(entry))
+        if response.status_code == 304 and entry:
+            return ScrapeResult(target, entry['price'], entry['price_text'], cache_status='not_modified')
+
+        digest = content_hash(response.content)
+        parse_started = time.perf_counter()
+        if entry and entry.get('content_hash') == digest:
+            cache_status = 'unchanged'
+            price, price_text = entry['price'], entry['price_text']
+        else:
+            cache_status = 'miss'
+            price, price_text = parse_price(response.content, target.price_selector, target.site)
+        parse_elapsed = time.perf_counter() - parse_started
+        self.cache.put(
+            target.url,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            content_hash=digest,
+            price_selector=target.price_selector,
+            price=price,
+            price_text=price_text,
+        )
+        return ScrapeResult(
+            target, price, price_text, cache_status=cache_status, downloaded=len(response.content),
+            parse_elapsed=parse_elapsed,
+        )
+
+    def scrape(self, target):
+        started = time.perf_counter()
+        self._local.fetch_elapsed = 0.0
+        try:
+            if self.cache is not None:
+                result = self._scrape_cached(target)
+            else:
+                response = self.fetch(target)
+                parse_started = time.perf_counter()
+                price, price_text = parse_price(response.content, target.price_selector, target.site)
+                result = ScrapeResult(
+                    target, price, price_text, downloaded=len(response.content),
+                    parse_elapsed=time.perf_counter() - parse_started,
+                )
+        except Exception as e:
+            result = ScrapeResult(target, error=e)
+        result.elapsed = time.perf_counter() - started
+        result.fetch_elapsed = self._local.fetch_elapsed
+        return result
+
+    def run(self, targets):
+        """Scrapes every target, yielding results as they complete."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.scrape, target) for target in targets]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def close(self):
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
+        self._throttles.clear()
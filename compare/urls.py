@@ -10,5 +10,7 @@ urlpatterns = [
     path('remove/<int:product_id>/', views.remove_from_compare, name='remove_from_compare'),
     path('clear/', views.clear_compare, name='clear_compare'),
     path('product/<str:product_id>/', views.product_detail_view, name='product_detail'),
+    path('product/<str:product_id>/price-history/', views.price_history_view, name='product_price_history'),
     path('category/<str:category_name>/', views.category_view, name='compare_category'),
+    path('category/<str:category_name>/more/', views.category_view, {'load_more': True}, name='compare_category_more'),
 ]
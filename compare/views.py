@@ -2,31 +2,46 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 import json
 from dashboard.views import get_base_context
-from dashboard.models import Product, Brand, ProductOffer
-from django.db.models import Min, Max
+from dashboard.facets import apply_filters, compute_facets, parse_price
+from dashboard.pagination import paginate_request, load_more_response
+from dashboard.price_history import daily_chart, lowest_price_since
+from dashboard.models import Product, ProductOffer
 
 def compare_home(request):
     """Displays the main page for the compare feature, showing product categories."""
     context = get_base_context()
     return render(request, 'compare/compare.html', context)
 
-def category_view(request, category_name):
+def category_view(request, category_name, load_more=False):
     """Displays products from a selected category, with subcategory and brand filters."""
-    context = get_base_context()
-    
-    products = Product.objects.filter(category=category_name).prefetch_related('offers', 'brand')
-    subcategories = products.values('subcategory').distinct().order_by('subcategory')
-    brands = Brand.objects.filter(products__in=products).distinct().order_by('name')
+    products = Product.objects.filter(category=category_name)
+
+    selected_brands = request.GET.getlist('brand')
+    selected_subcategory = request.GET.get('subcategory')
+    selected_sort = request.GET.get('sort', 'name')
+    max_price_filter = parse_price(request.GET.get('max_price'))
+
+    filtered_products = apply_filters(products, brands=selected_brands, subcategory=selected_subcategory, max_price=max_price_filter)
+    page = paginate_request(request, filtered_products.select_related('brand', 'price_summary').prefetch_related('offers'))
+    if load_more:
+        return load_more_response(request, page, 'compare/_product_cards.html')
 
-    price_stats = ProductOffer.objects.filter(product__in=products).aggregate(min_price=Min('price'), max_price=Max('price'))
+    facets = compute_facets(products, brands=selected_brands, subcategory=selected_subcategory, max_price=max_price_filter)
+    max_price = facets['max_price'] or 100
 
+    context = get_base_context()
     context.update({
         'category_name': category_name,
-        'products': products,
-        'subcategories': subcategories,
-        'filter_brands': brands,
-        'min_price': price_stats['min_price'] or 0,
-        'max_price': price_stats['max_price'] or 100,
+        'products': page.items,
+        'next_cursor': page.next_cursor,
+        'subcategories': facets['subcategories'],
+        'filter_brands': facets['brands'],
+        'min_price': facets['min_price'] or 0,
+        'max_price': max_price,
+        'selected_brands': selected_brands,
+        'selected_subcategory': selected_subcategory,
+        'selected_max_price': max_price_filter if max_price_filter is not None else max_price,
+        'selected_sort': selected_sort,
     })
     return render(request, 'compare/category.html', context)
 
@@ -115,8 +130,31 @@ def clear_compare(request):
 
 def product_detail_view(request, product_id):
     context = get_base_context()
-    product = get_object_or_404(Product.objects.prefetch_related('offers'), id=product_id)
+    # Retired products stay reachable from wishlists and alerts, shown as discontinued
+    product = get_object_or_404(Product.all_objects.select_related('brand', 'price_summary').prefetch_related('offers'), id=product_id)
+    summary = getattr(product, 'price_summary', None)
+    lowest_30_days = lowest_price_since(product.id, days=30)
     context.update({
         'product': product,
+        'lowest_30_days': lowest_30_days,
+        'is_30_day_low': summary is not None and lowest_30_days is not None and summary.min_price <= lowest_30_days,
     })
     return render(request, 'compare/product_detail.html', context)
+
+def price_history_view(request, product_id):
+    """Returns daily lowest-price points for a product's price chart, from the daily rollups."""
+    product = get_object_or_404(Product.all_objects, id=product_id)
+    try:
+        days = min(max(int(request.GET.get('days', 365)), 1), 730)
+    except ValueError:
+        days = 365
+    points = [
+        {
+            'day': point['day'].isoformat(),
+            'min_price': point['min_price'],
+            'max_price': point['max_price'],
+            'close_price': point['close_price'],
+        }
+        for point in daily_chart(product.id, days=days)
+    ]
+    return JsonResponse({'product_id': product.id, 'days': days, 'points': points})
@@ -79,9 +79,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'kit.context_processors.kit_context',
-                'dashboard.context_processors.cart_context',
-                'dashboard.context_processors.wishlist_context',
-                'dashboard.context_processors.price_alert_context',
+                'dashboard.context_processors.header_counters',
             ],
         },
     },
@@ -144,6 +142,49 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# A cache shared by every process on the host (web workers and management commands), so that
+# invalidations such as a user's header counters reach all of them. The catalog version that
+# keys catalog caches is kept in the database (dashboard.CatalogVersion), not here.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'django_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# On-disk response cache used by the scrape_products command
+SCRAPE_CACHE_DIR = os.path.join(BASE_DIR, 'scrape_cache')
+
+# Normalized search queries, one per line, read by the warm_search_cache command
+SEARCH_QUERY_LOG = os.path.join(BASE_DIR, 'logs', 'search_queries.log')
+os.makedirs(os.path.dirname(SEARCH_QUERY_LOG), exist_ok=True)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message_only': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'search_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SEARCH_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 3,
+            'encoding': 'utf-8',
+            'formatter': 'message_only',
+        },
+    },
+    'loggers': {
+        'search.queries': {
+            'handlers': ['search_queries'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Brand, Product, ProductOffer, Cart, CartItem, Wishlist, PriceAlert, Order, OrderItem
+from .models import Brand, Product, ProductOffer, ProductPriceSummary, Cart, CartItem, Wishlist, PriceAlert, Order, OrderItem, OutboundEmail
 
 class BrandAdmin(admin.ModelAdmin):
     list_display = ('name', 'logo_url')
@@ -8,12 +8,23 @@ class BrandAdmin(admin.ModelAdmin):
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'brand', 'category', 'subcategory')
     search_fields = ('name', 'brand__name')
-    list_filter = ('brand', 'category', 'subcategory')
+    list_filter = ('is_active', 'brand', 'category', 'subcategory')
+
+    def get_queryset(self, request):
+        return Product.all_objects.all()
 
 class ProductOfferAdmin(admin.ModelAdmin):
-    list_display = ('product', 'site', 'price', 'rating')
+    list_display = ('product', 'site', 'price', 'rating', 'is_active')
     search_fields = ('product__name', 'site')
-    list_filter = ('site', 'rating')
+    list_filter = ('is_active', 'site', 'rating')
+
+    def get_queryset(self, request):
+        return ProductOffer.all_objects.all()
+
+class ProductPriceSummaryAdmin(admin.ModelAdmin):
+    list_display = ('product', 'min_price', 'max_price', 'max_rating', 'offer_count', 'last_changed')
+    search_fields = ('product__name',)
+    readonly_fields = ('product', 'min_price', 'max_price', 'best_offer', 'max_rating', 'offer_count', 'last_changed')
 
 class CartAdmin(admin.ModelAdmin):
     list_display = ('user', 'created_at')
@@ -38,12 +49,20 @@ class OrderAdmin(admin.ModelAdmin):
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ('order', 'product_offer', 'quantity', 'price')
 
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    search_fields = ('subject',)
+    list_filter = ('status',)
+    readonly_fields = ('attempts', 'last_error', 'created_at', 'sent_at')
+
 admin.site.register(Brand, BrandAdmin)
 admin.site.register(Product, ProductAdmin)
 admin.site.register(ProductOffer, ProductOfferAdmin)
+admin.site.register(ProductPriceSummary, ProductPriceSummaryAdmin)
 admin.site.register(Cart, CartAdmin)
 admin.site.register(CartItem, CartItemAdmin)
 admin.site.register(Wishlist, WishlistAdmin)
 admin.site.register(PriceAlert, PriceAlertAdmin)
 admin.site.register(Order, OrderAdmin)
 admin.site.register(OrderItem, OrderItemAdmin)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+
+from .models import Cart, CartItem
+
+_MONEY_FIELD = DecimalField(max_digits=10, decimal_places=2)
+_CENT = Decimal('0.01')
+# Lines whose offer the catalog has since retired stay in the cart but are not sold
+_AVAILABLE = Q(product_offer__is_active=True)
+
+
+def _subtotal():
+    return F('product_offer__price') * F('quantity')
+
+
+def get_cart(user):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    return cart
+
+
+def cart_lines(cart):
+    """Returns the cart's items with their offers, products and line subtotals loaded in one query."""
+    return list(
+        cart.items.select_related('product_offer__product')
+        .annotate(subtotal=_subtotal())
+        .order_by('id')
+    )
+
+
+def cart_total(cart):
+    """Sums price x quantity over the cart's available lines in the database."""
+    total = cart.items.aggregate(total=Sum(_subtotal(), filter=_AVAILABLE, output_field=_MONEY_FIELD))['total']
+    return total or 0
+
+
+def add_offer(cart, offer_id, quantity=1):
+    """
+    Adds `quantity` of an offer to the cart.
+
+    The quantity is incremented in the database rather than read, changed and
+    written back, so concurrent adds are never lost. The (cart, offer) unique
+    constraint turns a race between two first adds into an increment.
+    """
+    lines = CartItem.objects.filter(cart=cart, product_offer_id=offer_id)
+    if lines.update(quantity=F('quantity') + quantity):
+        return
+    try:
+        with transaction.atomic():
+            CartItem.objects.create(cart=cart, product_offer_id=offer_id, quantity=quantity)
+    except IntegrityError:
+        lines.update(quantity=F('quantity') + quantity)
+
+
+def change_quantity(cart, item_id, delta):
+    """
+    Changes a line's quantity by `delta`, removing the line when it would drop below one.
+
+    Returns False if the cart has no such line.
+    """
+    line = CartItem.objects.filter(id=item_id, cart=cart)
+    with transaction.atomic():
+        if line.filter(quantity__gt=-delta).update(quantity=F('quantity') + delta):
+            return True
+        return line.delete()[0] > 0
+
+
+def remove_line(cart, item_id):
+    """Removes a line from the cart. Returns False if the cart has no such line."""
+    return CartItem.objects.filter(id=item_id, cart=cart).delete()[0] > 0
+
+
+def cart_delta(cart, item_id=None):
+    """
+    Returns what a cart page needs to update in place after a change, computed in one query.
+
+    The line's quantity and subtotal are 0 once the line has been removed.
+    """
+    line = Q(id=item_id)
+    totals = cart.items.aggregate(
+        cart_total=Sum(_subtotal(), filter=_AVAILABLE, output_field=_MONEY_FIELD),
+        cart_item_count=Count('id'),
+        line_quantity=Sum('quantity', filter=line),
+        line_subtotal=Sum(_subtotal(), filter=line, output_field=_MONEY_FIELD),
+    )
+    return {
+        'item_id': item_id,
+        'quantity': totals['line_quantity'] or 0,
+        'line_subtotal': Decimal(totals['line_subtotal'] or 0).quantize(_CENT),
+        'cart_total': Decimal(totals['cart_total'] or 0).quantize(_CENT),
+        'cart_item_count': totals['cart_item_count'],
+    }
@@ -0,0 +1,171 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CatalogVersion
+
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+# The longest a process keeps an in-memory catalog index without rebuilding it
+VERSIONED_VALUE_MAX_AGE = 60 * 15
+# How long a process trusts the version it last read before reading it again
+CATALOG_VERSION_RECHECK = 1.0
+
+_version_memo = (float('-inf'), None)
+
+
+def _read_catalog_version():
+    version = CatalogVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+    if version is None:
+        row, _ = CatalogVersion.objects.get_or_create(pk=1)
+        version = row.version
+    return version
+
+
+def get_catalog_version():
+    """
+    Returns the current catalog version, shared by every process through the database.
+
+    The value is re-read at most once every CATALOG_VERSION_RECHECK seconds, so
+    a request that consults several versioned caches costs one lookup.
+    """
+    global _version_memo
+    checked_at, version = _version_memo
+    now = time.monotonic()
+    if version is None or now - checked_at >= CATALOG_VERSION_RECHECK:
+        version = _read_catalog_version()
+        _version_memo = (now, version)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidates every catalog-derived cache entry by moving to a new version."""
+    global _version_memo
+    if not CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        try:
+            with transaction.atomic():
+                CatalogVersion.objects.create(pk=1, version=2)
+        except IntegrityError:
+            CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1)
+    # Read it back on the next lookup rather than trusting a value that may yet roll back
+    _version_memo = (float('-inf'), None)
+    return _read_catalog_version()
+
+
+class LRUCache:
+    """A small thread-safe, process-local LRU mapping with optional expiry and hit/miss counters."""
+
+    def __init__(self, maxsize=32, timeout=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            expires_at, value = self._data[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.timeout if self.timeout is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+_local_cache = LRUCache(maxsize=16)
+
+
+def get_versioned(name, builder, timeout=CATALOG_CACHE_TIMEOUT):
+    """
+    Returns the value stored under `name` for the current catalog version.
+
+    Lookups go to the process-local LRU first, then to the Django cache, and
+    only call `builder()` when neither holds an entry for this version.
+    """
+    key = f'dashboard:{name}:v{get_catalog_version()}'
+    value = _local_cache.get(key)
+    if value is not None:
+        return value
+
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout)
+    _local_cache.set(key, value)
+    return value
+
+
+class VersionedValue:
+    """
+    A process-local value rebuilt lazily whenever the catalog version changes.
+
+    Suited to in-memory indexes that are too large to round-trip through the
+    Django cache on every request. As a fallback for changes that never bump
+    the version, such as rows edited directly in the database, the value is
+    also rebuilt once it is older than `max_age` seconds.
+    """
+
+    def __init__(self, builder, max_age=VERSIONED_VALUE_MAX_AGE):
+        self._builder = builder
+        self.max_age = max_age
+        self._lock = Lock()
+        self._version = None
+        self._built_at = None
+        self._value = None
+
+    def _is_stale(self, version):
+        return (
+            self._version != version
+            or self._built_at is None
+            or time.monotonic() - self._built_at >= self.max_age
+        )
+
+    def get(self):
+        version = get_catalog_version()
+        if self._is_stale(version):
+            with self._lock:
+                if self._is_stale(version):
+                    self._value = self._builder()
+                    self._version = version
+                    self._built_at = time.monotonic()
+        return self._value
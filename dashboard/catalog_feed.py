@@ -0,0 +1,98 @@
+import json
+import textwrap
+
+CHUNK_SIZE = 64 * 1024
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+
+def is_ndjson(path):
+    return str(path).lower().endswith(NDJSON_EXTENSIONS)
+
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """
+    Yields the elements of the JSON array in text file `f` one at a time.
+
+    The file is read in chunks and only the element being decoded is kept in
+    memory, so a catalog of any size is parsed in constant memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+    state = 'open'  # then 'first' (value or ]), 'value', 'separator' (, or ])
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ValueError('Unexpected end of file inside a JSON array')
+            chunk = f.read(chunk_size)
+            buffer, pos, eof = chunk, 0, not chunk
+            continue
+
+        char = buffer[pos]
+        if state == 'open':
+            if char != '[':
+                raise ValueError(f'Expected a JSON array, found {char!r}')
+            pos += 1
+            state = 'first'
+        elif state == 'separator' or (state == 'first' and char == ']'):
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f'Expected "," or "]" in JSON array, found {char!r}')
+            pos += 1
+            state = 'value'
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                error = None
+            except json.JSONDecodeError as e:
+                end, error = None, e
+            # Only a value followed by "," or "]" is known to be whole; a number
+            # such as "1." can decode as a prefix of one continuing in the next chunk
+            if end is not None:
+                following = end
+                while following < len(buffer) and buffer[following] in ' \t\r\n':
+                    following += 1
+                if following < len(buffer) and buffer[following] in ',]':
+                    complete = True
+                else:
+                    complete = eof
+            if end is None or not complete:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    if error is not None:
+                        raise error
+                    eof = True
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield value
+            pos = end
+            state = 'separator'
+
+
+def iter_ndjson(f):
+    """Yields one record per non-blank line of newline-delimited JSON."""
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_records(f, ndjson=False):
+    return iter_ndjson(f) if ndjson else iter_json_array(f)
+
+
+def write_records(f, records, ndjson=False):
+    """Writes records as they are produced, as an indented JSON array or as NDJSON. Returns the number written."""
+    count = 0
+    for record in records:
+        if ndjson:
+            f.write(json.dumps(record) + '\n')
+        else:
+            f.write('[\n' if count == 0 else ',\n')
+            f.write(textwrap.indent(json.dumps(record, indent=2), '  '))
+        count += 1
+    if not ndjson:
+        f.write('\n]' if count else '[]')
+    return count
@@ -0,0 +1,224 @@
+import os
+import re
+from collections import Counter
+from decimal import Decimal
+from itertools import islice
+
+from search import fts
+
+from .catalog_cache import bump_catalog_version
+from .models import Brand, Product, ProductOffer
+from .price_alerts import check_product_alerts
+from .price_history import record_prices
+from .price_summary import refresh_price_summaries
+
+LOAD_BATCH_SIZE = 2000
+_CENT = Decimal('0.01')
+
+
+def normalize_brand_name(name):
+    """Normalizes a brand name or filename for easier matching."""
+    name = os.path.splitext(name)[0]
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def _decimal(value):
+    return None if value is None else Decimal(str(value)).quantize(_CENT)
+
+
+class CatalogSync:
+    """
+    Brings the catalog in line with a product feed, writing only the rows that differ.
+
+    Products are matched by (brand, name) and offers by (product, site). New
+    rows are inserted and changed fields updated, with one bulk query of each
+    kind per batch. Products and offers missing from the feed are retired
+    (is_active=False) rather than deleted, so carts, wishlists, alerts and
+    orders that point at them survive; a retired row that reappears in the
+    feed is restored. Categories are only assigned to new products unless
+    `reassign_categories` is set, in which case every product takes the
+    category of its position in the feed.
+
+    Bulk writes send no signals, so each batch then does the work the
+    ProductOffer and Product signals would have done: price summaries, search
+    index, price history and price alerts. Run it inside a transaction so a
+    sync commits once, not once per row.
+    """
+
+    PRODUCT_FIELDS = ['description', 'image', 'is_active']
+    OFFER_FIELDS = ['price', 'url', 'rating', 'review', 'is_active']
+
+    def __init__(self, category_pairs, logo_map=None, batch_size=LOAD_BATCH_SIZE, warn=None, reassign_categories=False):
+        self.category_pairs = category_pairs
+        self.logo_map = logo_map or {}
+        self.batch_size = batch_size
+        self.warn = warn or (lambda message: None)
+        self.reassign_categories = reassign_categories
+        self.brands = {brand.name: brand for brand in Brand.objects.all()}
+        self.created_brands = []
+        self.product_count = 0
+        self.offer_count = 0
+        self.product_changes = Counter()
+        self.offer_changes = Counter()
+        self._index = 0
+        self._seen = set()
+
+    def _load_brands(self, names):
+        missing = [name for name in dict.fromkeys(names) if name not in self.brands]
+        created = Brand.objects.bulk_create([
+            Brand(name=name, logo_url=self.logo_map.get(normalize_brand_name(name))) for name in missing
+        ])
+        for brand in created:
+            self.brands[brand.name] = brand
+        self.created_brands.extend(brand.name for brand in created)
+
+    def _batches(self, records):
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    @property
+    def changed(self):
+        return any(count for key, count in (self.product_changes + self.offer_changes).items() if key != 'unchanged')
+
+    def _sync_products(self, pending):
+        """Creates and updates the batch's products. Returns them by (brand id, name), and the ids written."""
+        keys = {(self.brands[brand].id, name): entry for (brand, name), entry in pending.items()}
+        existing = {
+            (product.brand_id, product.name): product
+            for product in Product.all_objects.filter(
+                brand_id__in={brand_id for brand_id, _ in keys}, name__in={name for _, name in keys},
+            )
+        }
+        created, updated = [], []
+        for key, (record, category, subcategory) in keys.items():
+            values = {
+                'description': record.get('description', 'No description available.'),
+                'image': record.get('image', 'default.jpg'),
+                'is_active': True,
+            }
+            if self.reassign_categories:
+                values.update(category=category, subcategory=subcategory)
+            product = existing.get(key)
+            if product is None:
+                values.update(category=category, subcategory=subcategory)
+                created.append(Product(brand_id=key[0], name=key[1], **values))
+                continue
+            if product.id in self._seen:
+                self.warn(f"Duplicate product in feed, keeping the last entry: {product.name}")
+            if any(getattr(product, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(product, field, value)
+                updated.append(product)
+            else:
+                self.product_changes['unchanged'] += 1
+
+        Product.objects.bulk_create(created)
+        fields = self.PRODUCT_FIELDS + (['category', 'subcategory'] if self.reassign_categories else [])
+        Product.all_objects.bulk_update(updated, fields)
+        self.product_changes['created'] += len(created)
+        self.product_changes['updated'] += len(updated)
+        products = {key: existing.get(key) for key in keys}
+        products.update({(product.brand_id, product.name): product for product in created})
+        return {key: (products[key], entry[0]) for key, entry in keys.items()}, [p.id for p in created + updated]
+
+    def _sync_offers(self, products):
+        """Creates, updates and retires the offers of the batch's products. Returns (ids touched, new prices)."""
+        incoming = {}
+        for product, record in products.values():
+            for offer_data in record.get('offers', []):
+                incoming[(product.id, offer_data.get('site'))] = offer_data
+        existing = {
+            (offer.product_id, offer.site): offer
+            for offer in ProductOffer.all_objects.filter(product_id__in=[product.id for product, _ in products.values()])
+        }
+
+        created, updated, prices = [], [], []
+        for (product_id, site), offer_data in incoming.items():
+            values = {
+                'price': _decimal(offer_data.get('price')),
+                'url': offer_data.get('url'),
+                'rating': _decimal(offer_data.get('rating')),
+                'review': offer_data.get('review') or '',
+                'is_active': True,
+            }
+            offer = existing.get((product_id, site))
+            if offer is None:
+                created.append(ProductOffer(product_id=product_id, site=site, **values))
+                prices.append((product_id, site, values['price']))
+                continue
+            if any(getattr(offer, field) != value for field, value in values.items()):
+                if offer.price != values['price'] or not offer.is_active:
+                    prices.append((product_id, site, values['price']))
+                for field, value in values.items():
+                    setattr(offer, field, value)
+                updated.append(offer)
+            else:
+                self.offer_changes['unchanged'] += 1
+
+        retired = [offer for key, offer in existing.items() if key not in incoming and offer.is_active]
+        for offer in retired:
+            offer.is_active = False
+        ProductOffer.objects.bulk_create(created, batch_size=self.batch_size)
+        ProductOffer.all_objects.bulk_update(updated + retired, self.OFFER_FIELDS, batch_size=self.batch_size)
+        self.offer_changes['created'] += len(created)
+        self.offer_changes['updated'] += len(updated)
+        self.offer_changes['retired'] += len(retired)
+        return {offer.product_id for offer in created + updated + retired}, prices
+
+    def load_batch(self, records):
+        """Syncs one batch of records."""
+        pending = {}
+        for record in records:
+            category, subcategory = self.category_pairs[self._index % len(self.category_pairs)]
+            self._index += 1
+            if not record.get('brand'):
+                self.warn(f"Skipping product with no brand: {record.get('name')}")
+                continue
+            key = (record['brand'], record['name'])
+            if key in pending:
+                self.warn(f"Duplicate product in feed, keeping the last entry: {record['name']}")
+            pending[key] = (record, category, subcategory)
+        if not pending:
+            return
+
+        self._load_brands([brand for brand, _ in pending])
+        products, written_ids = self._sync_products(pending)
+        offer_product_ids, prices = self._sync_offers(products)
+        self._seen.update(product.id for product, _ in products.values())
+        self.product_count += len(products)
+        self.offer_count += sum(len(record.get('offers', [])) for _, record in products.values())
+
+        touched = set(written_ids) | offer_product_ids
+        refresh_price_summaries(touched)
+        fts.index_products(written_ids)
+        record_prices(prices)
+        check_product_alerts({product_id for product_id, _, _ in prices})
+
+    def retire_missing(self):
+        """Retires every active product, and its offers, that the feed did not list. Returns the number retired."""
+        active_ids = Product.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=self.batch_size)
+        missing = [product_id for product_id in active_ids if product_id not in self._seen]
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            Product.all_objects.filter(id__in=batch).update(is_active=False)
+            self.offer_changes['retired'] += ProductOffer.objects.filter(product_id__in=batch).update(is_active=False)
+            refresh_price_summaries(batch)
+            fts.index_products(batch)
+        self.product_changes['retired'] += len(missing)
+        return len(missing)
+
+    def load(self, records):
+        """Syncs every record from any iterable, then retires what the feed no longer lists."""
+        for batch in self._batches(records):
+            self.load_batch(batch)
+        # An empty feed is far more likely a broken export than a discontinued catalog
+        if self._seen:
+            self.retire_missing()
+        else:
+            self.warn('The feed listed no products; nothing was retired.')
+        if self.changed:
+            bump_catalog_version()
@@ -0,0 +1,39 @@
+from django.db import transaction
+
+from .cart import cart_lines, cart_total
+from .models import Cart, Order, OrderItem
+
+
+class EmptyCartError(Exception):
+    pass
+
+
+def place_order(user):
+    """
+    Turns the available lines of the user's cart into an order and removes them from the cart.
+
+    Everything runs in one transaction with the cart row locked, so two
+    concurrent checkouts cannot both convert the same items and a failure
+    part-way through leaves neither an order nor an emptied cart. Returns
+    the order and the cart lines it was built from. Lines whose offer has been
+    retired are left in the cart; a cart with nothing else raises EmptyCartError.
+    """
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(user=user)
+        cart = Cart.objects.select_for_update().get(pk=cart.pk)
+        lines = [line for line in cart_lines(cart) if line.product_offer.is_active]
+        if not lines:
+            raise EmptyCartError('The cart has no available items.')
+
+        order = Order.objects.create(user=user, total_price=cart_total(cart))
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_offer=line.product_offer,
+                quantity=line.quantity,
+                price=line.product_offer.price,
+            )
+            for line in lines
+        ])
+        cart.items.filter(id__in=[line.id for line in lines]).delete()
+    return order, lines
@@ -0,0 +1,129 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import BooleanField, Case, Count, F, Max, Min, Value, When
+from django.db.models.functions import Coalesce, Floor
+
+PRICE_HISTOGRAM_STEP = Decimal('500')
+RATING_LEVELS = [5, 4, 3, 2, 1]
+
+
+def parse_rating(value):
+    """Returns the rating filter as an int between 1 and 5, or None when absent or invalid."""
+    try:
+        rating = int(value)
+    except (TypeError, ValueError):
+        return None
+    return rating if 1 <= rating <= 5 else None
+
+
+def parse_price(value):
+    """Returns the price filter as a Decimal, or None when absent or invalid."""
+    if value in (None, ''):
+        return None
+    try:
+        price = Decimal(str(value))
+    except InvalidOperation:
+        return None
+    # NaN and Infinity parse as Decimals but cannot be compared against prices
+    return price if price.is_finite() else None
+
+
+def apply_filters(products, brands=None, subcategory=None, rating=None, max_price=None):
+    """Applies the listing filters using the denormalized price summary."""
+    if brands:
+        products = products.filter(brand__name__in=brands)
+    if subcategory:
+        products = products.filter(subcategory=subcategory)
+    if rating is not None:
+        products = products.filter(price_summary__max_rating__gte=rating)
+    if max_price is not None:
+        products = products.filter(price_summary__min_price__lte=max_price)
+    else:
+        products = products.filter(price_summary__isnull=False)
+    return products
+
+
+def _facet_cells(products, max_price):
+    if max_price is not None:
+        within_price = When(price_summary__min_price__lte=max_price, then=Value(True))
+    else:
+        within_price = When(price_summary__isnull=False, then=Value(True))
+
+    return products.annotate(
+        rating_floor=Coalesce(Floor('price_summary__max_rating'), Value(Decimal('0'))),
+        price_bucket=Floor(F('price_summary__min_price') / Value(PRICE_HISTOGRAM_STEP)),
+        within_price=Case(within_price, default=Value(False), output_field=BooleanField()),
+    ).values(
+        'brand_id', 'brand__name', 'subcategory', 'rating_floor', 'price_bucket', 'within_price',
+    ).annotate(
+        count=Count('id'),
+        cell_min_price=Min('price_summary__min_price'),
+        cell_max_price=Max('price_summary__max_price'),
+    ).order_by()
+
+
+def compute_facets(products, brands=None, subcategory=None, rating=None, max_price=None):
+    """
+    Computes every facet of a product listing from a single grouped query.
+
+    The listing is grouped into cells of (brand, subcategory, rating, price
+    bucket, within selected price), which is small compared to the product
+    count. Each facet's counts are then conditioned on all the *other* active
+    filters, so a shopper sees how many products selecting a value would give.
+    """
+    brand_counts = {}
+    subcategory_counts = {}
+    rating_counts = dict.fromkeys(range(6), 0)
+    histogram = {}
+    min_price = None
+    max_price_seen = None
+    total = 0
+
+    for cell in _facet_cells(products, max_price):
+        count = cell['count']
+        rating_floor = int(cell['rating_floor'])
+        brand_ok = not brands or cell['brand__name'] in brands
+        subcategory_ok = not subcategory or cell['subcategory'] == subcategory
+        rating_ok = rating is None or rating_floor >= rating
+        price_ok = cell['within_price']
+
+        brand_counts.setdefault((cell['brand__name'], cell['brand_id']), 0)
+        subcategory_counts.setdefault(cell['subcategory'], 0)
+
+        if subcategory_ok and rating_ok and price_ok:
+            brand_counts[(cell['brand__name'], cell['brand_id'])] += count
+        if brand_ok and rating_ok and price_ok:
+            subcategory_counts[cell['subcategory']] += count
+        if brand_ok and subcategory_ok and price_ok:
+            rating_counts[min(rating_floor, 5)] += count
+        if brand_ok and subcategory_ok and rating_ok and cell['price_bucket'] is not None:
+            bucket = int(cell['price_bucket'])
+            histogram[bucket] = histogram.get(bucket, 0) + count
+        if brand_ok and subcategory_ok and rating_ok and price_ok:
+            total += count
+
+        if cell['cell_min_price'] is not None:
+            min_price = cell['cell_min_price'] if min_price is None else min(min_price, cell['cell_min_price'])
+            max_price_seen = cell['cell_max_price'] if max_price_seen is None else max(max_price_seen, cell['cell_max_price'])
+
+    return {
+        'brands': [
+            {'id': brand_id, 'name': name, 'count': count}
+            for (name, brand_id), count in sorted(brand_counts.items())
+        ],
+        'subcategories': [
+            {'name': name, 'count': count}
+            for name, count in sorted(subcategory_counts.items(), key=lambda item: (item[0] is None, item[0] or ''))
+        ],
+        'ratings': [
+            {'rating': level, 'count': sum(rating_counts[r] for r in range(level, 6))}
+            for level in RATING_LEVELS
+        ],
+        'price_histogram': [
+            {'min': bucket * PRICE_HISTOGRAM_STEP, 'max': (bucket + 1) * PRICE_HISTOGRAM_STEP, 'count': histogram[bucket]}
+            for bucket in sorted(histogram)
+        ],
+        'min_price': min_price,
+        'max_price': max_price_seen,
+        'total': total,
+    }
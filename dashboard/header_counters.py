@@ -0,0 +1,70 @@
+from functools import cached_property
+
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.contrib.auth.models import User
+
+from .models import CartItem, Wishlist, PriceAlert
+
+HEADER_COUNTERS_TIMEOUT = 60 * 15
+EMPTY_COUNTERS = {'cart_item_count': 0, 'wishlist_item_count': 0, 'price_alert_count': 0}
+
+
+def _cache_key(user_id):
+    return f'dashboard:header_counters:{user_id}'
+
+
+def _count(queryset, user_field):
+    """A scalar subquery counting the rows of `queryset` that belong to the outer user."""
+    counts = (
+        queryset.filter(**{user_field: OuterRef('pk')})
+        .order_by()
+        .values(user_field)
+        .annotate(n=Count('*'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def get_header_counters(user_id):
+    """Returns the user's cart, wishlist and active price alert counts, computed in one query and cached."""
+    key = _cache_key(user_id)
+    counters = cache.get(key)
+    if counters is None:
+        counters = User.objects.filter(pk=user_id).values(
+            cart_item_count=_count(CartItem.objects.all(), 'cart__user'),
+            wishlist_item_count=_count(Wishlist.objects.all(), 'user'),
+            price_alert_count=_count(PriceAlert.objects.filter(is_active=True), 'user'),
+        ).first() or EMPTY_COUNTERS
+        cache.set(key, counters, HEADER_COUNTERS_TIMEOUT)
+    return counters
+
+
+def invalidate_header_counters(*user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+class HeaderCounters:
+    """Template-facing counters that are only looked up when a template reads one of them."""
+
+    def __init__(self, user):
+        self._user = user
+
+    @cached_property
+    def _counters(self):
+        if not self._user.is_authenticated:
+            return EMPTY_COUNTERS
+        return get_header_counters(self._user.pk)
+
+    @property
+    def cart_item_count(self):
+        return self._counters['cart_item_count']
+
+    @property
+    def wishlist_item_count(self):
+        return self._counters['wishlist_item_count']
+
+    @property
+    def price_alert_count(self):
+        return self._counters['price_alert_count']
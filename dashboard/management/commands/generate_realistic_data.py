@@ -3,6 +3,7 @@ import random
 import os
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from dashboard.catalog_feed import is_ndjson, write_records
 
 # --- Data for Generation ---
 PRODUCT_ADJECTIVES = ['Luminous', 'Matte', 'Velvet', 'Silk', 'Radiant', 'Intense', 'Sheer', 'HD', 'Pro', 'Ultimate', '24H', 'Aqua']
@@ -20,7 +21,11 @@ SITES = ['Nykaa', 'Amazon', 'Purplle', 'Flipkart']
 class Command(BaseCommand):
     help = 'Generates a large, realistic dataset of products from brand_data.json and saves it to product.json.'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--per-brand', type=int, default=10, help='Products generated for each brand.')
+        parser.add_argument('--output', help='File to write, a JSON array or NDJSON (.ndjson, .jsonl). Defaults to dashboard/static/data/product.json.')
+
+    def handle(self, *args, **options):
         self.stdout.write('Generating realistic test product records from brand_data.json...')
         
         # --- Load Brand and Category Data ---
@@ -32,7 +37,16 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'Error: brand_data.json not found at {brand_data_path}'))
             return
 
-        products = []
+        # --- Save to file, writing each record as it is generated ---
+        output_path = options['output'] or settings.BASE_DIR / 'dashboard' / 'static' / 'data' / 'product.json'
+        try:
+            with open(output_path, 'w') as f:
+                count = write_records(f, self.generate_products(brands_data, options['per_brand']), ndjson=is_ndjson(output_path))
+            self.stdout.write(self.style.SUCCESS(f'Successfully generated {count} products and saved to {output_path}'))
+        except IOError as e:
+            self.stdout.write(self.style.ERROR(f'Error writing to file: {e}'))
+
+    def generate_products(self, brands_data, per_brand):
         product_id = 1
 
         for brand_info in brands_data:
@@ -48,8 +62,8 @@ class Command(BaseCommand):
             if not possible_products:
                 continue
 
-            # Generate 10 unique products for the brand
-            for _ in range(10):
+            # Generate per_brand products for the brand
+            for _ in range(per_brand):
                 category_name, product_noun = random.choice(possible_products)
                 product_adj = random.choice(PRODUCT_ADJECTIVES)
                 product_name = f"{brand_name} {product_adj} {product_noun}"
@@ -79,14 +93,5 @@ class Command(BaseCommand):
                     "image": f"https://placehold.co/300x300/9E9E9E/ffffff?text={product_noun.replace(' ', '+')}",
                     "offers": offers
                 }
-                products.append(product_record)
+                yield product_record
                 product_id += 1
-
-        # --- Save to file ---
-        output_path = settings.BASE_DIR / 'dashboard' / 'static' / 'data' / 'product.json'
-        try:
-            with open(output_path, 'w') as f:
-                json.dump(products, f, indent=2)
-            self.stdout.write(self.style.SUCCESS(f'Successfully generated {len(products)} products and saved to {output_path}'))
-        except IOError as e:
-            self.stdout.write(self.style.ERROR(f'Error writing to file: {e}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from dashboard.price_history import prune_price_history
+
+class Command(BaseCommand):
+    help = 'Drops raw price samples and daily price rollups that are past their retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--raw-days', type=int, default=90, help='Days of raw price samples to keep.')
+        parser.add_argument('--daily-days', type=int, default=730, help='Days of daily price rollups to keep.')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Pruning price history...')
+        samples, rollups = prune_price_history(options['raw_days'], options['daily_days'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {samples} raw samples and {rollups} daily rollups.'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from dashboard.price_summary import rebuild_price_summaries
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized per-product price and rating summaries from all product offers.'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Rebuilding product price summaries...')
+        written = rebuild_price_summaries()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt price summaries for {written} products.'))
@@ -1,35 +1,34 @@
 import json
 import os
-import re
+import time
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from dashboard.models import Brand, Product, ProductOffer
-
-def normalize_brand_name(name):
-    """Normalizes a brand name or filename for easier matching."""
-    name = os.path.splitext(name)[0]
-    return re.sub(r'[^a-z0-9]', '', name.lower())
+from django.db import transaction
+from dashboard.catalog_feed import is_ndjson, iter_records
+from dashboard.catalog_loader import LOAD_BATCH_SIZE, CatalogSync, normalize_brand_name
 
 class Command(BaseCommand):
     help = 'Seeds the database with product data from a consolidated product.json file.'
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write('Seeding database from consolidated product.json...')
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Product file to load, a JSON array or NDJSON (.ndjson, .jsonl). Defaults to dashboard/static/data/product.json.')
+        parser.add_argument('--reload', action='store_true',
+                            help='Also reassign every product the category of its position in the file, as a fresh load would. '
+                                 'Products are matched and kept rather than deleted, so their price history, carts and orders survive.')
+        parser.add_argument('--batch-size', type=int, default=LOAD_BATCH_SIZE, help='Products written per bulk insert.')
 
-        # --- Clear existing product data ONLY ---
-        ProductOffer.objects.all().delete()
-        Product.objects.all().delete()
-        self.stdout.write('Cleared existing products and offers. Brands will be preserved.')
+    def handle(self, *args, **options):
+        self.stdout.write('Seeding database from consolidated product.json...')
 
         # --- Load Data ---
-        product_json_path = settings.BASE_DIR / 'dashboard' / 'static' / 'data' / 'product.json'
+        product_json_path = options['file'] or settings.BASE_DIR / 'dashboard' / 'static' / 'data' / 'product.json'
         categories_json_path = settings.BASE_DIR / 'dashboard' / 'static' / 'data' / 'categories.json'
 
         try:
-            with open(product_json_path, 'r') as f:
-                products_data = json.load(f)
             with open(categories_json_path, 'r') as f:
                 categories_data = json.load(f)
+            # Products are streamed from the file record by record during the load, never held all at once
+            products_file = open(product_json_path, 'r', encoding='utf-8')
         except FileNotFoundError as e:
             self.stdout.write(self.style.ERROR(f'Error: {e}. Make sure product.json and categories.json exist.'))
             return
@@ -42,6 +41,7 @@ class Command(BaseCommand):
 
         if not category_pairs:
             self.stdout.write(self.style.ERROR('No categories or subcategories found in categories.json. Aborting.'))
+            products_file.close()
             return
 
         # --- Logo finding logic ---
@@ -54,50 +54,31 @@ class Command(BaseCommand):
                 normalized_name = normalize_brand_name(filename)
                 logo_map[normalized_name] = f"dashboard/logos/{filename}"
 
-        # --- Create brands, products, and offers ---
-        for i, product_data in enumerate(products_data):
-            brand_name = product_data.get('brand')
-            if not brand_name:
-                self.stdout.write(self.style.WARNING(f"Skipping product with no brand: {product_data.get('name')}"))
-                continue
-
-            # Use get_or_create to avoid deleting existing brands
-            brand, created = Brand.objects.get_or_create(name=brand_name)
-
-            if created:
-                self.stdout.write(f'Created new brand: {brand_name}')
-                normalized_brand = normalize_brand_name(brand_name)
-                logo_url = logo_map.get(normalized_brand)
-                if logo_url:
-                    brand.logo_url = logo_url
-                    brand.save()
-
-            # Assign category and subcategory cyclically
-            cat, subcat = category_pairs[i % len(category_pairs)]
-
-            product = Product.objects.create(
-                name=product_data['name'],
-                brand=brand,
-                description=product_data.get('description', 'No description available.'),
-                image=product_data.get('image', 'default.jpg'),
-                category=cat,
-                subcategory=subcat,
+        # --- Sync products and offers in one transaction ---
+        # Even a reload syncs rather than deletes: price history, carts, wishlists,
+        # alerts and orders all point at products and offers and would cascade away
+        started = time.perf_counter()
+        loader = CatalogSync(
+            category_pairs,
+            logo_map,
+            batch_size=options['batch_size'],
+            warn=lambda message: self.stdout.write(self.style.WARNING(message)),
+            reassign_categories=options['reload'],
+        )
+        with products_file, transaction.atomic():
+            loader.load(iter_records(products_file, ndjson=is_ndjson(product_json_path)))
+        elapsed = time.perf_counter() - started
+
+        for brand_name in loader.created_brands:
+            self.stdout.write(f'Created new brand: {brand_name}')
+        rows = loader.product_count + loader.offer_count
+        self.stdout.write(
+            f'Loaded {loader.product_count} products and {loader.offer_count} offers in {elapsed:.1f}s '
+            f'({rows / elapsed if elapsed else rows:.0f} rows/s).'
+        )
+        for label, changes in (('Products', loader.product_changes), ('Offers', loader.offer_changes)):
+            self.stdout.write(
+                f"{label}: {changes['created']} created, {changes['updated']} updated, "
+                f"{changes['unchanged']} unchanged, {changes['retired']} retired."
             )
-
-            # Create offers directly from the 'offers' list in the JSON
-            offers = product_data.get('offers', [])
-            if not offers:
-                self.stdout.write(self.style.WARNING(f"No offers found for product: {product.name}"))
-                continue
-
-            for offer_data in offers:
-                ProductOffer.objects.create(
-                    product=product,
-                    site=offer_data.get('site'),
-                    price=offer_data.get('price'),
-                    url=offer_data.get('url'),
-                    rating=offer_data.get('rating'),
-                    review=offer_data.get('review')
-                )
-
         self.stdout.write(self.style.SUCCESS('Database seeded successfully from consolidated product.json!'))
@@ -0,0 +1,59 @@
+import time
+from collections import deque
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.outbox import claim_due_emails, send_email
+
+class Command(BaseCommand):
+    help = 'Sends queued outbox emails in batches over one reused SMTP connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails fetched from the outbox per batch.')
+        parser.add_argument('--rate-limit', type=int, default=60, help='Maximum emails sent per minute.')
+        parser.add_argument('--poll-interval', type=float, default=10, help='Seconds to wait when the outbox is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once no due emails remain instead of polling.')
+
+    def handle(self, *args, **options):
+        for option in ('batch_size', 'rate_limit'):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be at least 1.")
+
+        connection = get_connection()
+        sent_times = deque()
+        sent = failed = 0
+
+        try:
+            while True:
+                batch = claim_due_emails(options['batch_size'])
+                if not batch:
+                    if options['once']:
+                        break
+                    # Don't hold an idle SMTP session open between polls
+                    connection.close()
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                for email in batch:
+                    self._throttle(sent_times, options['rate_limit'])
+                    if send_email(email, connection):
+                        sent += 1
+                    else:
+                        failed += 1
+                        self.stdout.write(self.style.WARNING(f'Failed to send email {email.pk}: {email.last_error}'))
+                    sent_times.append(time.monotonic())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} emails, {failed} failed attempts.'))
+
+    def _throttle(self, sent_times, rate_limit):
+        """Sleeps until sending one more email keeps the last minute within rate_limit."""
+        now = time.monotonic()
+        while sent_times and now - sent_times[0] >= 60:
+            sent_times.popleft()
+        if len(sent_times) >= rate_limit:
+            time.sleep(60 - (now - sent_times[0]))
+            sent_times.popleft()
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-17 12:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, OuterRef, Subquery
+
+
+def populate_price_summaries(apps, schema_editor):
+    Product = apps.get_model('dashboard', 'Product')
+    ProductOffer = apps.get_model('dashboard', 'ProductOffer')
+    ProductPriceSummary = apps.get_model('dashboard', 'ProductPriceSummary')
+
+    best_offer = ProductOffer.objects.filter(product=OuterRef('pk')).order_by('price', 'id').values('id')[:1]
+    rows = Product.objects.annotate(
+        offer_count=Count('offers'),
+        min_price=Min('offers__price'),
+        max_price=Max('offers__price'),
+        max_rating=Max('offers__rating'),
+        best_offer_id=Subquery(best_offer),
+    ).filter(offer_count__gt=0).values('id', 'offer_count', 'min_price', 'max_price', 'max_rating', 'best_offer_id')
+
+    ProductPriceSummary.objects.bulk_create(
+        [
+            ProductPriceSummary(
+                product_id=row['id'],
+                min_price=row['min_price'],
+                max_price=row['max_price'],
+                best_offer_id=row['best_offer_id'],
+                max_rating=row['max_rating'],
+                offer_count=row['offer_count'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_order_orderitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPriceSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='price_summary', serialize=False, to='dashboard.product')),
+                ('min_price', models.DecimalField(db_index=True, decimal_places=2, max_digits=10)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_rating', models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=3, null=True)),
+                ('offer_count', models.PositiveIntegerField(default=0)),
+                ('last_changed', models.DateTimeField(auto_now=True)),
+                ('best_offer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='dashboard.productoffer')),
+            ],
+        ),
+        migrations.RunPython(populate_price_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 13:03
+
+from django.db import migrations
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    CartItem = apps.get_model('dashboard', 'CartItem')
+
+    duplicates = (
+        CartItem.objects.values('cart_id', 'product_offer_id')
+        .annotate(rows=Count('id'), keep_id=Min('id'), total=Sum('quantity'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        lines = CartItem.objects.filter(cart_id=row['cart_id'], product_offer_id=row['product_offer_id'])
+        lines.filter(id=row['keep_id']).update(quantity=row['total'])
+        lines.exclude(id=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_outboundemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cart_items, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='cartitem',
+            unique_together={('cart', 'product_offer')},
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 13:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_cartitem_unique_offer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pricealert',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['product', 'desired_price'], name='dashboard_active_alert_idx'),
+        ),
+    ]
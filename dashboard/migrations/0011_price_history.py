@@ -0,0 +1,71 @@
+# Generated by Django 5.2.4 on 2026-10-17 13:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def record_current_prices(apps, schema_editor):
+    # Start each series from today's offer prices so later changes have a baseline
+    ProductOffer = apps.get_model('dashboard', 'ProductOffer')
+    PriceHistory = apps.get_model('dashboard', 'PriceHistory')
+    DailyPrice = apps.get_model('dashboard', 'DailyPrice')
+
+    now = timezone.now()
+    today = timezone.localdate(now)
+    current = {}
+    for product_id, site, price in ProductOffer.objects.order_by('id').values_list('product_id', 'site', 'price').iterator():
+        current[(product_id, site)] = price
+
+    PriceHistory.objects.bulk_create(
+        [PriceHistory(product_id=p, site=s, price=price, recorded_at=now) for (p, s), price in current.items()],
+        batch_size=1000,
+    )
+    DailyPrice.objects.bulk_create(
+        [
+            DailyPrice(product_id=p, site=s, day=today, min_price=price, max_price=price, close_price=price)
+            for (p, s), price in current.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_pricealert_active_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('site', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('close_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_prices', to='dashboard.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'day'], name='dashboard_d_product_53c7af_idx')],
+                'unique_together': {('product', 'site', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('site', models.CharField(max_length=50)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='dashboard.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'site', 'recorded_at'], name='dashboard_p_product_d0a953_idx')],
+            },
+        ),
+        migrations.RunPython(record_current_prices, migrations.RunPython.noop),
+    ]
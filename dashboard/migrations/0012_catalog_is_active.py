@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_price_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='productoffer',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -1,7 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 import uuid
 
+class ActiveManager(models.Manager):
+    """Hides catalog rows retired by a catalog sync; `all_objects` still sees them."""
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
 class Brand(models.Model):
     name = models.CharField(max_length=100, unique=True)
     logo_url = models.CharField(max_length=255, blank=True, null=True)
@@ -16,6 +22,11 @@ class Product(models.Model):
     image = models.URLField()
     category = models.CharField(max_length=100, blank=True, null=True)
     subcategory = models.CharField(max_length=100, blank=True, null=True)
+    # False once the product drops out of the supplier feed; kept so carts, alerts and orders still resolve
+    is_active = models.BooleanField(default=True)
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.name
@@ -27,6 +38,10 @@ class ProductOffer(models.Model):
     url = models.URLField()
     rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
     review = models.TextField(blank=True)
+    is_active = models.BooleanField(default=True)
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['price']
@@ -34,6 +49,19 @@ class ProductOffer(models.Model):
     def __str__(self):
         return f"{self.product.name} on {self.site} for ₹{self.price}"
 
+class ProductPriceSummary(models.Model):
+    """Denormalized price and rating figures for a product, maintained from its offers."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='price_summary')
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, db_index=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2)
+    best_offer = models.ForeignKey(ProductOffer, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    max_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True, db_index=True)
+    offer_count = models.PositiveIntegerField(default=0)
+    last_changed = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product.name}: ₹{self.min_price} - ₹{self.max_price} across {self.offer_count} offers"
+
 class Cart(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -46,6 +74,9 @@ class CartItem(models.Model):
     product_offer = models.ForeignKey(ProductOffer, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        unique_together = ('cart', 'product_offer')
+
     def __str__(self):
         return f"{self.quantity} of {self.product_offer.product.name} from {self.product_offer.site}"
 
@@ -69,6 +100,10 @@ class PriceAlert(models.Model):
 
     class Meta:
         unique_together = ('user', 'product')
+        indexes = [
+            # Finds the alerts a new offer price can trigger: WHERE product = %s AND desired_price >= %s
+            models.Index(fields=['product', 'desired_price'], condition=models.Q(is_active=True), name='dashboard_active_alert_idx'),
+        ]
 
     def __str__(self):
         return f"Alert for {self.product.name} at ₹{self.desired_price} for {self.user.username}"
@@ -100,3 +135,75 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.quantity} of {self.product_offer.product.name} in order {self.order.order_id}"
+
+class OutboundEmail(models.Model):
+    """An email waiting in the outbox for the send_outbox worker."""
+    STATUS_CHOICES = (
+        ('Pending', 'Pending'),
+        ('Sending', 'Sending'),
+        ('Sent', 'Sent'),
+        ('Failed', 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Set by the worker that claimed the email for sending
+    claim_token = models.CharField(max_length=32, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
+
+class PriceHistory(models.Model):
+    """An append-only record of each change in a product's price on a site."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_history')
+    site = models.CharField(max_length=50)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['product', 'site', 'recorded_at'])]
+
+    def __str__(self):
+        return f"{self.product.name} on {self.site}: ₹{self.price} at {self.recorded_at}"
+
+class DailyPrice(models.Model):
+    """One day of a product's price on a site, rolled up from PriceHistory."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_prices')
+    site = models.CharField(max_length=50)
+    day = models.DateField()
+    min_price = models.DecimalField(max_digits=10, decimal_places=2)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2)
+    close_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        unique_together = ('product', 'site', 'day')
+        indexes = [models.Index(fields=['product', 'day'])]
+
+    def __str__(self):
+        return f"{self.product.name} on {self.site}, {self.day}: ₹{self.min_price} - ₹{self.max_price}"
+
+class CatalogVersion(models.Model):
+    """
+    A single-row counter bumped on every catalog change, so caches keyed on it go stale everywhere at once.
+
+    It lives in the database rather than the cache so that every process sees
+    the same value, it is never evicted, and a bump made inside a transaction
+    only takes effect when the catalog change it describes commits.
+    """
+    version = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"Catalog version {self.version}"
+
@@ -0,0 +1,104 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 60
+RETRY_MAX_DELAY = 60 * 60
+# How long a claimed email is reserved for its worker; a worker that dies leaves it due again after this
+CLAIM_TIMEOUT = 15 * 60
+
+
+def _build(subject, message, recipient_list, from_email=None, html_message=None):
+    return OutboundEmail(
+        subject=subject,
+        body=message,
+        html_body=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+
+
+def queue_email(subject, message, recipient_list, from_email=None, html_message=None):
+    """Adds an email to the outbox. Mirrors send_mail, with from_email defaulting to DEFAULT_FROM_EMAIL."""
+    email = _build(subject, message, recipient_list, from_email, html_message)
+    email.save()
+    return email
+
+
+def queue_emails(messages):
+    """Adds many emails to the outbox in one insert. `messages` holds dicts of queue_email arguments."""
+    return OutboundEmail.objects.bulk_create([_build(**message) for message in messages])
+
+
+def claim_due_emails(limit):
+    """
+    Claims up to `limit` due emails for the calling worker and returns them.
+
+    Claimed emails are marked Sending and pushed CLAIM_TIMEOUT into the
+    future, so concurrent workers never pick up the same email. The claim is
+    a single UPDATE that only matches rows still due, and the claim token
+    tells which of them this worker won. Returns an empty list only once
+    nothing is due.
+    """
+    while True:
+        now = timezone.now()
+        due = OutboundEmail.objects.filter(status__in=['Pending', 'Sending'], next_attempt_at__lte=now)
+        ids = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        token = uuid.uuid4().hex
+        due.filter(id__in=ids).update(
+            status='Sending', claim_token=token, next_attempt_at=now + timedelta(seconds=CLAIM_TIMEOUT),
+        )
+        claimed = list(OutboundEmail.objects.filter(id__in=ids, claim_token=token).order_by('id'))
+        # Another worker got every one of them first; look again
+        if claimed:
+            return claimed
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt, doubling after every failure."""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def send_email(email, connection):
+    """
+    Sends one outbox email over an already open connection and records the outcome.
+
+    Failures are rescheduled with exponential backoff until MAX_ATTEMPTS is
+    reached, after which the email is marked as failed. Returns True if the
+    email was sent.
+    """
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email, email.recipients, connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+
+    email.attempts += 1
+    try:
+        # A no-op while the connection is open; reconnects after a failure closed it.
+        connection.open()
+        connection.send_messages([message])
+    except Exception as e:
+        connection.close()
+        email.last_error = str(e)
+        if email.attempts >= MAX_ATTEMPTS:
+            email.status = 'Failed'
+        else:
+            email.status = 'Pending'
+            email.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(email.attempts))
+        email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+        return False
+
+    email.status = 'Sent'
+    email.sent_at = timezone.now()
+    email.last_error = ''
+    email.save(update_fields=['attempts', 'last_error', 'status', 'sent_at'])
+    return True
@@ -0,0 +1,137 @@
+import base64
+import binascii
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.core.paginator import Paginator
+from django.db.models import DecimalField, F, Q, Value
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 96
+
+_PRICE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+_RATING_FIELD = DecimalField(max_digits=3, decimal_places=2)
+
+# sort name -> (key expression, descending, cursor value parser)
+# Products without offers have no price summary, so their keys are coalesced
+# to a value that places them last in every ordering.
+SORT_KEYS = {
+    'name': (F('name'), False, str),
+    'price_asc': (Coalesce('price_summary__min_price', Value(Decimal('99999999.99'), output_field=_PRICE_FIELD)), False, Decimal),
+    'price_desc': (Coalesce('price_summary__min_price', Value(Decimal('-1'), output_field=_PRICE_FIELD)), True, Decimal),
+    'rating': (Coalesce('price_summary__max_rating', Value(Decimal('-1'), output_field=_RATING_FIELD)), True, Decimal),
+}
+DEFAULT_SORT = 'name'
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing."""
+
+    def __init__(self, items, next_cursor, sort):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.sort = sort
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(value, pk):
+    raw = json.dumps([str(value), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parser):
+    """Returns the (sort value, id) pair encoded in a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, pk = json.loads(raw)
+        value, pk = parser(value), int(pk)
+    except (binascii.Error, ValueError, TypeError, OverflowError, InvalidOperation):
+        return None
+    # json.loads accepts NaN and Infinity, which no sort key can be compared against
+    if isinstance(value, Decimal) and not value.is_finite():
+        return None
+    return value, pk
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def paginate(queryset, sort=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns the page of `queryset` that follows `cursor` when ordered by `sort`.
+
+    Rows are ordered by the sort key with the primary key as a tie-breaker and
+    the next page starts strictly after the last (key, id) pair returned, so a
+    page costs one indexed range scan and never a COUNT.
+    """
+    if sort not in SORT_KEYS:
+        sort = DEFAULT_SORT
+    expression, descending, parser = SORT_KEYS[sort]
+
+    queryset = queryset.alias(sort_key=expression)
+    position = decode_cursor(cursor, parser)
+    if position is not None:
+        value, pk = position
+        direction = 'lt' if descending else 'gt'
+        queryset = queryset.filter(Q(**{f'sort_key__{direction}': value}) | Q(sort_key=value, id__gt=pk))
+
+    queryset = queryset.annotate(sort_value=F('sort_key')).order_by('-sort_key' if descending else 'sort_key', 'id')
+    items = list(queryset[:page_size + 1])
+
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(last.sort_value, last.id)
+    return KeysetPage(items, next_cursor, sort)
+
+
+def paginate_request(request, queryset, default_sort=DEFAULT_SORT):
+    """Paginates a queryset using the `sort`, `cursor` and `page_size` query parameters."""
+    return paginate(
+        queryset,
+        sort=request.GET.get('sort') or default_sort,
+        cursor=request.GET.get('cursor'),
+        page_size=parse_page_size(request.GET.get('page_size')),
+    )
+
+
+def load_more_response(request, page, template_name, context=None):
+    """Renders a page of items with a partial template for a "load more" JSON request."""
+    context = dict(context or {})
+    context['products'] = page.items
+    return JsonResponse({
+        'html': render_to_string(template_name, context, request=request),
+        'next_cursor': page.next_cursor,
+        'has_next': page.has_next,
+    })
+
+
+def paginate_numbered(request, queryset, per_page):
+    """
+    Returns the Page named by the `page` query parameter, for short per-user lists.
+
+    Account pages (orders, wishlist, price alerts) are bounded by one user's
+    activity and keyed by non-integer ids, so numbered pages are simpler than
+    keyset cursors there.
+    """
+    return Paginator(queryset, per_page).get_page(request.GET.get('page'))
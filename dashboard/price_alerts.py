@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models import DecimalField, F, Min, OuterRef, Subquery
+
+from .header_counters import invalidate_header_counters
+from .models import PriceAlert, ProductOffer
+from .outbox import queue_emails
+
+ALERT_BATCH_SIZE = 2000
+
+
+def triggered_alerts(product_ids=None):
+    """
+    Returns the active alerts whose product now sells at or below the desired price.
+
+    The lowest price comes from a correlated MIN over the product's offers, so
+    the whole triggered set is one statement however many alerts are active.
+    """
+    lowest_price = (
+        ProductOffer.objects.filter(product=OuterRef('product_id'))
+        .order_by()
+        .values('product')
+        .annotate(lowest=Min('price'))
+        .values('lowest')
+    )
+    alerts = PriceAlert.objects.filter(is_active=True)
+    if product_ids is not None:
+        alerts = alerts.filter(product_id__in=product_ids)
+    return (
+        alerts.annotate(lowest_price=Subquery(lowest_price, output_field=DecimalField(max_digits=10, decimal_places=2)))
+        .filter(lowest_price__lte=F('desired_price'))
+        .select_related('user', 'product')
+        .only('id', 'desired_price', 'user__id', 'user__username', 'user__email', 'product__id', 'product__name')
+        .order_by('id')
+    )
+
+
+def _notification(alert):
+    return {
+        'subject': 'Price Alert! Your product is now available at a lower price!',
+        'message': f"Hi {alert.user.username},\n\nThe price for {alert.product.name} has dropped to ₹{alert.lowest_price:.2f}!",
+        'recipient_list': [alert.user.email],
+    }
+
+
+def notify_alerts(alerts):
+    """
+    Queues a notification for every alert in `alerts` and deactivates them, in one transaction.
+
+    Alerts deactivated concurrently are skipped, so a user is never notified
+    twice for the same alert. Returns the number of alerts notified.
+    """
+    alerts = {alert.pk: alert for alert in alerts}
+    if not alerts:
+        return 0
+    with transaction.atomic():
+        still_active = list(
+            PriceAlert.objects.select_for_update()
+            .filter(pk__in=alerts, is_active=True)
+            .values_list('pk', flat=True)
+        )
+        if not still_active:
+            return 0
+        PriceAlert.objects.filter(pk__in=still_active).update(is_active=False)
+        queue_emails([_notification(alerts[pk]) for pk in still_active])
+    invalidate_header_counters(*{alerts[pk].user_id for pk in still_active})
+    return len(still_active)
+
+
+def process_triggered_alerts(product_ids=None, batch_size=ALERT_BATCH_SIZE):
+    """
+    Notifies every triggered alert in batches of `batch_size`. Yields the number notified per batch.
+
+    Batches are fetched by keyset on the alert id rather than through one open
+    cursor, because each batch commits updates to the table being read.
+    """
+    alerts = triggered_alerts(product_ids)
+    last_id = 0
+    while True:
+        batch = list(alerts.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        last_id = batch[-1].id
+        yield notify_alerts(batch)
+
+
+def check_offer_price(product_id, price):
+    """
+    Notifies the alerts a product's new offer price triggers. Returns the number notified.
+
+    Only alerts at or above `price` can have been triggered by this write, so
+    the lookup is a range scan on the active-alert (product, desired_price)
+    index rather than a pass over every alert.
+    """
+    return notify_alerts(triggered_alerts([product_id]).filter(desired_price__gte=price))
+
+
+def check_product_alerts(product_ids):
+    """Notifies triggered alerts for products whose offers were written without signals, e.g. by bulk_create or update()."""
+    return sum(process_triggered_alerts(product_ids=list(set(product_ids))))
@@ -0,0 +1,148 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max, Min, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import DailyPrice, PriceHistory
+
+HISTORY_BATCH_SIZE = 1000
+_CENT = Decimal('0.01')
+
+
+def _latest_samples(product_ids, before=None):
+    """The newest sample of every (product, site) series of the given products, optionally as of `before`."""
+    samples = PriceHistory.objects.filter(product_id__in=product_ids)
+    if before is not None:
+        samples = samples.filter(recorded_at__lt=before)
+    return samples.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('product_id'), F('site')],
+            order_by=[F('recorded_at').desc(), F('id').desc()],
+        )
+    ).filter(position=1)
+
+
+def _roll_up(keys, prices, previous, day):
+    """Folds new prices into the day's rollup rows, creating rows for series not yet seen that day."""
+    existing = {
+        (row.product_id, row.site): row
+        for row in DailyPrice.objects.filter(day=day, product_id__in={p for p, _ in keys})
+    }
+    created, updated = [], []
+    for key in keys:
+        price = prices[key]
+        row = existing.get(key)
+        if row is None:
+            # The price in effect since an earlier day also held for part of this one
+            opening = previous.get(key, price)
+            created.append(DailyPrice(
+                product_id=key[0], site=key[1], day=day,
+                min_price=min(opening, price), max_price=max(opening, price), close_price=price,
+            ))
+        else:
+            row.min_price = min(row.min_price, price)
+            row.max_price = max(row.max_price, price)
+            row.close_price = price
+            updated.append(row)
+    DailyPrice.objects.bulk_create(created)
+    DailyPrice.objects.bulk_update(updated, ['min_price', 'max_price', 'close_price'])
+
+
+def record_prices(prices, at=None):
+    """
+    Appends the prices that changed since they were last recorded and updates the day's rollups.
+
+    `prices` is an iterable of (product_id, site, price). Unchanged prices
+    write nothing, so calling this on every offer save or scrape keeps the
+    history compact. Returns the number of changes recorded.
+    """
+    at = at or timezone.now()
+    day = timezone.localdate(at)
+    latest = {}
+    for product_id, site, price in prices:
+        latest[(product_id, site)] = Decimal(str(price)).quantize(_CENT)
+
+    keys = list(latest)
+    recorded = 0
+    for start in range(0, len(keys), HISTORY_BATCH_SIZE):
+        batch = set(keys[start:start + HISTORY_BATCH_SIZE])
+        previous = {
+            (sample.product_id, sample.site): sample.price
+            for sample in _latest_samples({p for p, _ in batch})
+            if (sample.product_id, sample.site) in batch
+        }
+        changed = [key for key in batch if previous.get(key) != latest[key]]
+        if not changed:
+            continue
+        with transaction.atomic():
+            PriceHistory.objects.bulk_create([
+                PriceHistory(product_id=p, site=s, price=latest[(p, s)], recorded_at=at) for p, s in changed
+            ])
+            _roll_up(changed, latest, previous, day)
+        recorded += len(changed)
+    return recorded
+
+
+def daily_chart(product_id, days=365):
+    """Returns one point per day with a recorded change, lowest across sites, oldest first."""
+    since = timezone.localdate() - timedelta(days=days)
+    points = (
+        DailyPrice.objects.filter(product_id=product_id, day__gte=since)
+        .values('day')
+        .annotate(low=Min('min_price'), high=Max('max_price'), close=Min('close_price'))
+        .order_by('day')
+    )
+    return [
+        {
+            'day': point['day'],
+            'min_price': point['low'].quantize(_CENT),
+            'max_price': point['high'].quantize(_CENT),
+            'close_price': point['close'].quantize(_CENT),
+        }
+        for point in points
+    ]
+
+
+def lowest_price_since(product_id, days=30):
+    """
+    The lowest price seen on any site in the last `days` days, or None without history.
+
+    Rollups only exist for days a price changed, so the price each site was
+    at when the window opened counts too; a price that has not moved in
+    longer than `days` is still the lowest one seen.
+    """
+    since = timezone.localdate() - timedelta(days=days)
+    lowest = DailyPrice.objects.filter(product_id=product_id, day__gte=since).aggregate(lowest=Min('min_price'))['lowest']
+    opening = timezone.make_aware(datetime.combine(since, time.min))
+    prices = [sample.price for sample in _latest_samples([product_id], before=opening)]
+    if lowest is not None:
+        prices.append(lowest)
+    return min(prices) if prices else None
+
+
+def prune_price_history(raw_days, daily_days, batch_size=HISTORY_BATCH_SIZE):
+    """
+    Drops raw samples older than `raw_days` and daily rollups older than `daily_days`.
+
+    Old raw samples are already summarised by the daily rollups. The newest
+    sample of every series is always kept, as the baseline that later prices
+    are compared against. Returns (samples deleted, rollups deleted).
+    """
+    cutoff = timezone.now() - timedelta(days=raw_days)
+    product_ids = list(
+        PriceHistory.objects.filter(recorded_at__lt=cutoff).order_by('product_id').values_list('product_id', flat=True).distinct()
+    )
+    samples_deleted = 0
+    for start in range(0, len(product_ids), batch_size):
+        batch = product_ids[start:start + batch_size]
+        keep = [sample.id for sample in _latest_samples(batch)]
+        samples_deleted += (
+            PriceHistory.objects.filter(product_id__in=batch, recorded_at__lt=cutoff).exclude(id__in=keep).delete()[0]
+        )
+
+    rollups_deleted = DailyPrice.objects.filter(day__lt=timezone.localdate() - timedelta(days=daily_days)).delete()[0]
+    return samples_deleted, rollups_deleted
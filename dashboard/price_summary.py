@@ -0,0 +1,80 @@
+from django.db.models import Count, Max, Min, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Product, ProductOffer, ProductPriceSummary
+
+SUMMARY_BATCH_SIZE = 1000
+
+
+def _summary_queryset(product_ids=None):
+    best_offer = ProductOffer.objects.filter(product=OuterRef('pk')).order_by('price', 'id').values('id')[:1]
+    # Retired products get no active offers counted, so their summaries are dropped
+    products = Product.all_objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+    active = Q(offers__is_active=True, is_active=True)
+    return products.annotate(
+        summary_min_price=Min('offers__price', filter=active),
+        summary_max_price=Max('offers__price', filter=active),
+        summary_max_rating=Max('offers__rating', filter=active),
+        summary_offer_count=Count('offers', filter=active),
+        summary_best_offer=Subquery(best_offer),
+    ).values(
+        'id', 'summary_min_price', 'summary_max_price', 'summary_max_rating',
+        'summary_offer_count', 'summary_best_offer',
+    )
+
+
+def _write_summaries(rows):
+    """Upserts summaries for products with offers and drops them for products without. Returns the rows written."""
+    now = timezone.now()
+    summaries = []
+    empty_ids = []
+    for row in rows:
+        if not row['summary_offer_count']:
+            empty_ids.append(row['id'])
+            continue
+        summaries.append(ProductPriceSummary(
+            product_id=row['id'],
+            min_price=row['summary_min_price'],
+            max_price=row['summary_max_price'],
+            best_offer_id=row['summary_best_offer'],
+            max_rating=row['summary_max_rating'],
+            offer_count=row['summary_offer_count'],
+            last_changed=now,
+        ))
+
+    if summaries:
+        ProductPriceSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['min_price', 'max_price', 'best_offer', 'max_rating', 'offer_count', 'last_changed'],
+        )
+    if empty_ids:
+        ProductPriceSummary.objects.filter(product_id__in=empty_ids).delete()
+    return len(summaries)
+
+
+def refresh_price_summaries(product_ids):
+    """Recomputes the summaries of the given products in one aggregate query and one upsert."""
+    product_ids = list(set(product_ids))
+    written = 0
+    for start in range(0, len(product_ids), SUMMARY_BATCH_SIZE):
+        batch = product_ids[start:start + SUMMARY_BATCH_SIZE]
+        written += _write_summaries(_summary_queryset(batch))
+    return written
+
+
+def rebuild_price_summaries():
+    """Recomputes every product's summary and removes summaries of products without offers."""
+    written = 0
+    batch = []
+    for row in _summary_queryset().order_by('id').iterator(chunk_size=SUMMARY_BATCH_SIZE):
+        batch.append(row)
+        if len(batch) >= SUMMARY_BATCH_SIZE:
+            written += _write_summaries(batch)
+            batch = []
+    if batch:
+        written += _write_summaries(batch)
+    return written
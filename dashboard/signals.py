@@ -0,0 +1,64 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Brand, Product, ProductOffer
+from .catalog_cache import bump_catalog_version
+from .price_summary import refresh_price_summaries
+from .price_alerts import check_offer_price
+from .price_history import record_prices
+
+_state = threading.local()
+
+
+@contextmanager
+def catalog_signals_suspended():
+    """
+    Skips the per-row catalog bookkeeping below, for bulk jobs that redo it in bulk afterwards.
+
+    Deleting a catalog otherwise refreshes a price summary for every offer
+    removed, one query each.
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def _suspended():
+    return getattr(_state, 'suspended', False)
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_cache(sender, **kwargs):
+    if _suspended():
+        return
+    bump_catalog_version()
+
+@receiver(post_save, sender=ProductOffer)
+@receiver(post_delete, sender=ProductOffer)
+def refresh_product_price_summary(sender, instance, **kwargs):
+    if _suspended():
+        return
+    refresh_price_summaries([instance.product_id])
+
+@receiver(post_save, sender=ProductOffer)
+def trigger_price_alerts(sender, instance, created, update_fields=None, **kwargs):
+    if _suspended() or update_fields is not None and 'price' not in update_fields:
+        return
+    product_id, price = instance.product_id, instance.price
+    # Notify only once the new price is committed; a failure here must not undo the write
+    transaction.on_commit(lambda: check_offer_price(product_id, price), robust=True)
+
+@receiver(post_save, sender=ProductOffer)
+def record_price_history(sender, instance, update_fields=None, **kwargs):
+    if _suspended() or update_fields is not None and 'price' not in update_fields:
+        return
+    record_prices([(instance.product_id, instance.site, instance.price)])
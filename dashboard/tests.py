@@ -1,3 +1,167 @@
-from django.test import TestCase
+import io
+import json
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from .catalog_feed import iter_json_array, iter_ndjson, write_records
+from .catalog_loader import CatalogSync
+from .models import Product, ProductOffer
+
+CHUNK_SIZES = [1, 2, 3, 5, 7, 16, 64, 1024, 64 * 1024]
+
+
+class IterJsonArrayTests(SimpleTestCase):
+    document = json.dumps([
+        {'name': 'Fit Me Foundation', 'brand': 'Maybelline', 'offers': [{'site': 'Nykaa', 'price': 519.0, 'rating': 4.3}]},
+        {'name': 'Kajal "Intense"', 'description': 'Line\nbreak, comma] and bracket', 'offers': []},
+        {'name': 'Crème éclat ✨', 'tags': ['a', 'b', {'nested': [1, [2, [3]]]}]},
+        12345678901234567890, -0.25, 1.5e10, 1.0, 0, True, False, None, '', [], {},
+    ], indent=2)
+
+    def parse(self, text, chunk_size):
+        return list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+
+    def test_matches_json_load_at_every_chunk_size(self):
+        expected = json.loads(self.document)
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.parse(self.document, chunk_size), expected)
+
+    def test_compact_and_empty_arrays(self):
+        for text in ['[]', ' [ ] ', '[1,2.5,"x"]', '\n[\n1\n]\n']:
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    self.assertEqual(self.parse(text, chunk_size), json.loads(text))
+
+    def test_numbers_split_across_chunks(self):
+        text = '[1.25,-3e-2,100]'
+        for chunk_size in range(1, len(text) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.parse(text, chunk_size), [1.25, -0.03, 100])
+
+    def test_malformed_input_raises(self):
+        for text in ['', '   ', '{"a": 1}', '[1, 2', '[1 2]', '[1,]', '[,1]', '[tru]', '["unterminated]', '[1.]']:
+            for chunk_size in (1, 4, 64 * 1024):
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    with self.assertRaises(ValueError):
+                        self.parse(text, chunk_size)
+
+    def test_yields_records_before_the_end_of_the_file(self):
+        records = iter_json_array(io.StringIO('[{"a": 1}, {"b": 2}, oops'), chunk_size=4)
+        self.assertEqual(next(records), {'a': 1})
+        self.assertEqual(next(records), {'b': 2})
+        with self.assertRaises(ValueError):
+            next(records)
+
+
+class WriteRecordsTests(SimpleTestCase):
+    records = [{'name': 'A', 'offers': [{'site': 'Nykaa', 'price': 10}]}, {'name': 'B'}]
+
+    def test_round_trips_as_json_array(self):
+        for records in (self.records, []):
+            f = io.StringIO()
+            self.assertEqual(write_records(f, records), len(records))
+            self.assertEqual(json.loads(f.getvalue()), records)
+
+    def test_round_trips_as_ndjson(self):
+        f = io.StringIO()
+        write_records(f, self.records, ndjson=True)
+        f.seek(0)
+        self.assertEqual(list(iter_ndjson(f)), self.records)
+
+
+def product(name, brand='Maybelline', description='A product.', **offers):
+    """A feed record with one offer per keyword argument, site=price."""
+    return {
+        'name': name,
+        'brand': brand,
+        'description': description,
+        'offers': [{'site': site, 'price': price, 'url': f'https://{site.lower()}.example/{name}'} for site, price in offers.items()],
+    }
+
+
+class CatalogSyncTests(TestCase):
+    category_pairs = [('Makeup', 'Face'), ('Makeup', 'Eyes')]
+
+    def sync(self, records, batch_size=100):
+        warnings = []
+        loader = CatalogSync(self.category_pairs, batch_size=batch_size, warn=warnings.append)
+        loader.load(records)
+        return loader, warnings
+
+    def offer(self, name, site):
+        return ProductOffer.all_objects.get(product__name=name, site=site)
+
+    def test_creates_products_offers_and_brands(self):
+        loader, _ = self.sync([product('Fit Me', Nykaa=519, Amazon=499), product('Kajal', brand='Lakme', Nykaa=199)])
+        self.assertEqual(loader.product_changes['created'], 2)
+        self.assertEqual(loader.offer_changes['created'], 3)
+        self.assertEqual(sorted(loader.created_brands), ['Lakme', 'Maybelline'])
+        self.assertEqual(self.offer('Fit Me', 'Amazon').price, Decimal('499.00'))
+        self.assertEqual(Product.objects.get(name='Kajal').category, 'Makeup')
+
+    def test_unchanged_feed_writes_nothing(self):
+        feed = [product('Fit Me', Nykaa=519), product('Kajal', Nykaa=199)]
+        self.sync(feed)
+        loader, _ = self.sync(feed)
+        self.assertEqual(loader.product_changes['unchanged'], 2)
+        self.assertEqual(loader.offer_changes['unchanged'], 2)
+        self.assertFalse(loader.changed)
+
+    def test_updates_changed_fields_only(self):
+        self.sync([product('Fit Me', Nykaa=519, Amazon=499), product('Kajal', Nykaa=199)])
+        loader, _ = self.sync([
+            product('Fit Me', Nykaa=479, Amazon=499),
+            product('Kajal', description='Now smudge-proof.', Nykaa=199),
+        ])
+        self.assertEqual(loader.offer_changes['updated'], 1)
+        self.assertEqual(loader.offer_changes['unchanged'], 2)
+        self.assertEqual(loader.product_changes['updated'], 1)
+        self.assertEqual(self.offer('Fit Me', 'Nykaa').price, Decimal('479.00'))
+        self.assertEqual(Product.objects.get(name='Kajal').description, 'Now smudge-proof.')
+
+    def test_retires_products_and_offers_missing_from_the_feed(self):
+        self.sync([product('Fit Me', Nykaa=519, Amazon=499), product('Kajal', Nykaa=199)])
+        loader, _ = self.sync([product('Fit Me', Nykaa=519)])
+        self.assertEqual(loader.product_changes['retired'], 1)
+        self.assertEqual(loader.offer_changes['retired'], 2)
+        self.assertFalse(Product.objects.filter(name='Kajal').exists())
+        self.assertFalse(Product.all_objects.get(name='Kajal').is_active)
+        self.assertFalse(self.offer('Kajal', 'Nykaa').is_active)
+        self.assertFalse(self.offer('Fit Me', 'Amazon').is_active)
+        self.assertTrue(self.offer('Fit Me', 'Nykaa').is_active)
+
+    def test_restores_retired_rows_that_reappear(self):
+        self.sync([product('Fit Me', Nykaa=519), product('Kajal', Nykaa=199)])
+        kajal_id = Product.objects.get(name='Kajal').id
+        self.sync([product('Fit Me', Nykaa=519)])
+        self.sync([product('Fit Me', Nykaa=519), product('Kajal', Nykaa=189)])
+        kajal = Product.objects.get(name='Kajal')
+        self.assertEqual(kajal.id, kajal_id)
+        offer = self.offer('Kajal', 'Nykaa')
+        self.assertTrue(offer.is_active)
+        self.assertEqual(offer.price, Decimal('189.00'))
+
+    def test_duplicates_within_a_batch_keep_the_last_entry(self):
+        loader, warnings = self.sync([product('Fit Me', Nykaa=519), product('Fit Me', Nykaa=479)])
+        self.assertEqual(Product.objects.filter(name='Fit Me').count(), 1)
+        self.assertEqual(self.offer('Fit Me', 'Nykaa').price, Decimal('479.00'))
+        self.assertTrue(any('Duplicate product' in warning for warning in warnings))
+
+    def test_duplicates_across_batches_keep_the_last_entry(self):
+        loader, warnings = self.sync(
+            [product('Fit Me', Nykaa=519), product('Kajal', Nykaa=199), product('Fit Me', Nykaa=479)], batch_size=1,
+        )
+        self.assertEqual(Product.objects.filter(name='Fit Me').count(), 1)
+        self.assertEqual(self.offer('Fit Me', 'Nykaa').price, Decimal('479.00'))
+        self.assertTrue(any('Duplicate product' in warning for warning in warnings))
+        self.assertEqual(loader.product_changes['retired'], 0)
+
+    def test_empty_feed_retires_nothing(self):
+        self.sync([product('Fit Me', Nykaa=519)])
+        loader, warnings = self.sync([])
+        self.assertEqual(loader.product_changes['retired'], 0)
+        self.assertTrue(Product.objects.filter(name='Fit Me').exists())
+        self.assertTrue(self.offer('Fit Me', 'Nykaa').is_active)
+        self.assertIn('The feed listed no products; nothing was retired.', warnings)
@@ -18,7 +18,9 @@ urlpatterns = [
     path('logout/', custom_logout_view, name='logout'),
     path('brands/', all_brands_view, name='all_brands'),
     path('brand/<str:brand_name>/', brand_detail_view, name='brand_detail'),
+    path('brand/<str:brand_name>/more/', brand_detail_view, {'load_more': True}, name='brand_detail_more'),
     path('category/<str:category_name>/', category_detail_view, name='category_detail'),
+    path('category/<str:category_name>/more/', category_detail_view, {'load_more': True}, name='category_detail_more'),
     path('cart/', cart_view, name='cart_view'),
     path('cart/remove/<int:item_id>/', remove_from_cart_view, name='remove_from_cart'),
     path('add-to-cart/', add_to_cart_view, name='add_to_cart'),
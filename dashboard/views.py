@@ -1,29 +1,37 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.core.mail import send_mail
+from django.http import Http404, JsonResponse
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
-from django.db.models import Min, Max, Count, Q
+from django.db.models import Count, Q, F, Sum, Prefetch
 from django.contrib import messages
 import json
 import os
 import re
 import math
 from django.conf import settings
-from .models import Brand, Product, ProductOffer, Cart, CartItem, Wishlist, PriceAlert, Order, OrderItem
+from .models import Brand, Product, ProductOffer, Wishlist, PriceAlert, Order, OrderItem
 from .forms import ContactForm
+from .catalog_cache import get_versioned
+from .cart import add_offer, cart_delta, cart_lines, cart_total, change_quantity, get_cart, remove_line
+from .checkout import EmptyCartError, place_order
+from .outbox import queue_email
+from .header_counters import invalidate_header_counters
+from .facets import apply_filters, compute_facets, parse_price, parse_rating
+from .pagination import paginate_numbered, paginate_request, load_more_response
 from urllib.parse import quote_plus
 
+ORDERS_PER_PAGE = 20
+LIST_ITEMS_PER_PAGE = 24
+
 def normalize_brand_name(name):
     """Normalizes a brand name or filename for easier matching."""
     name = os.path.splitext(name)[0]
     return re.sub(r'[^a-z0-9]', '', name.lower())
 
-def get_base_context():
-    """Loads the context required by the base template, fetching data from the database."""
-    brands = Brand.objects.annotate(num_products=Count('products')).filter(num_products__gt=0).order_by('name')
-    
+def _build_base_context():
+    brands = list(Brand.objects.annotate(num_products=Count('products', filter=Q(products__is_active=True))).filter(num_products__gt=0).order_by('name'))
+
     num_brands = len(brands)
     num_columns = 4
     brand_columns = []
@@ -35,15 +43,19 @@ def get_base_context():
     categories = [{'name': name} for name in category_names]
 
     return {
-        'brands': brands, 
-        'brand_columns': brand_columns, 
+        'brands': brands,
+        'brand_columns': brand_columns,
         'categories': categories
     }
 
+def get_base_context():
+    """Loads the context required by the base template, cached per catalog version."""
+    return dict(get_versioned('base_context', _build_base_context))
+
 @login_required
 def dashboard_home(request):
     context = get_base_context()
-    featured_brands = Brand.objects.annotate(num_products=Count('products')).filter(num_products__gt=0).order_by('-num_products')[:6]
+    featured_brands = Brand.objects.annotate(num_products=Count('products', filter=Q(products__is_active=True))).filter(num_products__gt=0).order_by('-num_products')[:6]
     context['featured_brands'] = featured_brands
     return render(request, 'dashboard/dashboard.html', context)
 
@@ -53,108 +65,117 @@ def all_brands_view(request):
     return render(request, 'dashboard/all_brands.html', context)
 
 @login_required
-def brand_detail_view(request, brand_name):
-    context = get_base_context()
+def brand_detail_view(request, brand_name, load_more=False):
     brand = get_object_or_404(Brand, name=brand_name)
-    products_for_brand = Product.objects.filter(brand=brand).prefetch_related('offers')
-
-    # Get available subcategories for filtering
-    available_subcategories = products_for_brand.values_list('subcategory', flat=True).distinct().order_by('subcategory')
-
-    # Calculate min and max price for the entire brand
-    price_range = products_for_brand.aggregate(min_price=Min('offers__price'), max_price=Max('offers__price'))
-    min_price = price_range.get('min_price') or 0
-    max_price = price_range.get('max_price') or 1000
+    products_for_brand = Product.objects.filter(brand=brand)
 
     # Get filter parameters from request
     selected_subcategory = request.GET.get('subcategory')
     selected_rating = request.GET.get('rating')
-    selected_max_price = request.GET.get('max_price', max_price)
-
-    # Apply filters
-    filtered_products = products_for_brand
-    if selected_subcategory:
-        filtered_products = filtered_products.filter(subcategory=selected_subcategory)
-    if selected_rating:
-        filtered_products = filtered_products.annotate(max_rating=Max('offers__rating')).filter(max_rating__gte=selected_rating)
-    if selected_max_price:
-        filtered_products = filtered_products.annotate(min_offer_price=Min('offers__price')).filter(min_offer_price__lte=selected_max_price)
+    selected_sort = request.GET.get('sort', 'name')
+    rating = parse_rating(selected_rating)
+    max_price_filter = parse_price(request.GET.get('max_price'))
+
+    # Apply filters and fetch one keyset page
+    filtered_products = apply_filters(products_for_brand, subcategory=selected_subcategory, rating=rating, max_price=max_price_filter)
+    filtered_products = filtered_products.select_related('brand', 'price_summary').prefetch_related('offers')
+    page = paginate_request(request, filtered_products)
+    if load_more:
+        return load_more_response(request, page, 'dashboard/_product_cards.html')
+
+    # Facet counts and the price range come from one grouped query
+    facets = compute_facets(products_for_brand, subcategory=selected_subcategory, rating=rating, max_price=max_price_filter)
+    min_price = facets['min_price'] or 0
+    max_price = facets['max_price'] or 1000
+    selected_max_price = max_price_filter if max_price_filter is not None else max_price
 
+    context = get_base_context()
     context.update({
         'brand_name': brand_name,
-        'products': filtered_products,
-        'available_subcategories': available_subcategories,
+        'products': page.items,
+        'next_cursor': page.next_cursor,
+        'product_count': facets['total'],
+        'available_subcategories': facets['subcategories'],
+        'rating_facets': facets['ratings'],
+        'price_histogram': facets['price_histogram'],
         'min_price': min_price,
         'max_price': max_price,
         'selected_subcategory': selected_subcategory,
         'selected_rating': selected_rating,
         'selected_max_price': selected_max_price,
+        'selected_sort': selected_sort,
     })
     return render(request, 'dashboard/brand_detail.html', context)
 
 @login_required
-def category_detail_view(request, category_name):
-    context = get_base_context()
-    products_in_category = Product.objects.filter(category=category_name).prefetch_related('offers', 'brand')
-
-    # Get available brands and subcategories for filtering
-    available_brands = Brand.objects.filter(products__in=products_in_category).distinct().order_by('name')
-    available_subcategories = products_in_category.values_list('subcategory', flat=True).distinct().order_by('subcategory')
-
-    # Calculate min and max price for the entire category
-    price_range = products_in_category.aggregate(min_price=Min('offers__price'), max_price=Max('offers__price'))
-    min_price = price_range.get('min_price') or 0
-    max_price = price_range.get('max_price') or 1000
+def category_detail_view(request, category_name, load_more=False):
+    products_in_category = Product.objects.filter(category=category_name)
 
     # Get filter parameters from request
     selected_brands = request.GET.getlist('brand')
     selected_subcategory = request.GET.get('subcategory')
     selected_rating = request.GET.get('rating')
-    selected_max_price = request.GET.get('max_price', max_price)
-
-    # Apply filters
-    filtered_products = products_in_category
-    if selected_brands:
-        filtered_products = filtered_products.filter(brand__name__in=selected_brands)
-    if selected_subcategory:
-        filtered_products = filtered_products.filter(subcategory=selected_subcategory)
-    if selected_rating:
-        filtered_products = filtered_products.annotate(max_rating=Max('offers__rating')).filter(max_rating__gte=selected_rating)
-    if selected_max_price:
-        filtered_products = filtered_products.annotate(min_offer_price=Min('offers__price')).filter(min_offer_price__lte=selected_max_price)
+    selected_sort = request.GET.get('sort', 'name')
+    rating = parse_rating(selected_rating)
+    max_price_filter = parse_price(request.GET.get('max_price'))
+
+    # Apply filters and fetch one keyset page
+    filtered_products = apply_filters(products_in_category, brands=selected_brands, subcategory=selected_subcategory, rating=rating, max_price=max_price_filter)
+    filtered_products = filtered_products.select_related('brand', 'price_summary').prefetch_related('offers')
+    page = paginate_request(request, filtered_products)
+    if load_more:
+        return load_more_response(request, page, 'dashboard/_product_cards.html')
+
+    # Facet counts and the price range come from one grouped query
+    facets = compute_facets(products_in_category, brands=selected_brands, subcategory=selected_subcategory, rating=rating, max_price=max_price_filter)
+    min_price = facets['min_price'] or 0
+    max_price = facets['max_price'] or 1000
+    selected_max_price = max_price_filter if max_price_filter is not None else max_price
 
+    context = get_base_context()
     context.update({
         'category_name': category_name,
-        'products': filtered_products,
-        'available_brands': available_brands,
-        'available_subcategories': available_subcategories,
+        'products': page.items,
+        'next_cursor': page.next_cursor,
+        'product_count': facets['total'],
+        'available_brands': facets['brands'],
+        'available_subcategories': facets['subcategories'],
+        'rating_facets': facets['ratings'],
+        'price_histogram': facets['price_histogram'],
         'min_price': min_price,
         'max_price': max_price,
         'selected_brands': selected_brands,
         'selected_subcategory': selected_subcategory,
         'selected_rating': selected_rating,
         'selected_max_price': selected_max_price,
+        'selected_sort': selected_sort,
     })
     return render(request, 'dashboard/category_detail.html', context)
 
+def _cart_response(request, cart, item_id=None):
+    """Answers a cart change with a JSON delta for fetch requests, or the cart page otherwise."""
+    invalidate_header_counters(request.user.pk)
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'status': 'success', **cart_delta(cart, item_id)})
+    return redirect('dashboard:cart_view')
+
 @login_required
 def cart_view(request):
     context = get_base_context()
-    cart, created = Cart.objects.get_or_create(user=request.user)
-    total_price = sum(item.product_offer.price * item.quantity for item in cart.items.all())
+    cart = get_cart(request.user)
 
     context.update({
-        'cart_items': cart.items.all(),
-        'total_price': total_price
+        'cart_items': cart_lines(cart),
+        'total_price': cart_total(cart)
     })
     return render(request, 'dashboard/cart.html', context)
 
 @login_required
 def remove_from_cart_view(request, item_id):
-    cart = Cart.objects.get(user=request.user)
-    cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
-    cart_item.delete()
-    return redirect('dashboard:cart_view')
+    cart = get_cart(request.user)
+    if not remove_line(cart, item_id):
+        raise Http404('No such cart item.')
+    return _cart_response(request, cart, item_id)
 
 @login_required
 def add_to_cart_view(request):
@@ -166,44 +187,31 @@ def add_to_cart_view(request):
             return JsonResponse({'status': 'error', 'message': 'Invalid offer ID'}, status=400)
 
         offer = get_object_or_404(ProductOffer, id=offer_id)
-        cart, created = Cart.objects.get_or_create(user=request.user)
-
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart, 
-            product_offer=offer, 
-            defaults={'quantity': 1}
-        )
-        
-        if not created:
-            cart_item.quantity += 1
-            cart_item.save()
+        cart = get_cart(request.user)
+        add_offer(cart, offer.id)
+        invalidate_header_counters(request.user.pk)
 
-        return JsonResponse({'status': 'success', 'cart_item_count': cart.items.count()})
+        return JsonResponse({'status': 'success', **cart_delta(cart)})
 
     return JsonResponse({'status': 'error', 'message': 'Invalid request method'}, status=400)
 
 @login_required
 def increase_cart_item_quantity(request, item_id):
-    cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
-    cart_item.quantity += 1
-    cart_item.save()
-    return redirect('dashboard:cart_view')
+    cart = get_cart(request.user)
+    if not change_quantity(cart, item_id, 1):
+        raise Http404('No such cart item.')
+    return _cart_response(request, cart, item_id)
 
 @login_required
 def decrease_cart_item_quantity(request, item_id):
-    cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
-    if cart_item.quantity > 1:
-        cart_item.quantity -= 1
-        cart_item.save()
-    else:
-        cart_item.delete()
-    return redirect('dashboard:cart_view')
+    cart = get_cart(request.user)
+    if not change_quantity(cart, item_id, -1):
+        raise Http404('No such cart item.')
+    return _cart_response(request, cart, item_id)
 
 @login_required
 def checkout_view(request):
-    cart, _ = Cart.objects.get_or_create(user=request.user)
-    cart_items = cart.items.all()
-    total_price = sum(item.product_offer.price * item.quantity for item in cart_items)
+    cart = get_cart(request.user)
 
     if request.method == 'POST':
         payment_method = request.POST.get('paymentMethod')
@@ -212,47 +220,36 @@ def checkout_view(request):
             messages.error(request, 'Please select a payment method.')
             context = get_base_context()
             context.update({
-                'cart_items': cart_items,
-                'total_price': total_price,
+                'cart_items': cart_lines(cart),
+                'total_price': cart_total(cart),
             })
             return render(request, 'dashboard/checkout.html', context)
 
         email = request.POST.get('email')
 
-        # Create the order
-        order = Order.objects.create(
-            user=request.user,
-            total_price=total_price
-        )
-
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product_offer=item.product_offer,
-                quantity=item.quantity,
-                price=item.product_offer.price
-            )
+        try:
+            order, cart_items = place_order(request.user)
+        except EmptyCartError:
+            messages.error(request, 'Your cart has no items available to order.')
+            return redirect('dashboard:cart_view')
+        invalidate_header_counters(request.user.pk)
 
         email_context = {
             'user': request.user,
             'cart_items': cart_items,
-            'total_price': total_price,
+            'total_price': order.total_price,
             'order': order
         }
         html_message = render_to_string('dashboard/order_confirmation_email.html', email_context)
         plain_message = strip_tags(html_message)
         
-        send_mail(
+        queue_email(
             f'Your Daily Glam Order Confirmation #{order.order_id}',
             plain_message,
-            settings.DEFAULT_FROM_EMAIL,
             [email],
-            fail_silently=False,
             html_message=html_message
         )
 
-        cart.items.all().delete()
-
         if payment_method == 'cod':
             messages.success(request, 'Your order has been placed successfully with Cash on Delivery.')
         elif payment_method == 'upi':
@@ -265,8 +262,8 @@ def checkout_view(request):
 
     context = get_base_context()
     context.update({
-        'cart_items': cart_items,
-        'total_price': total_price
+        'cart_items': cart_lines(cart),
+        'total_price': cart_total(cart)
     })
     return render(request, 'dashboard/checkout.html', context)
 
@@ -276,14 +273,24 @@ def order_successful_view(request):
 
 @login_required
 def order_history_view(request):
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
+    orders = (
+        Order.objects.filter(user=request.user)
+        .only('order_id', 'created_at', 'total_price', 'status')
+        .annotate(item_count=Sum('items__quantity'))
+        .order_by('-created_at', 'order_id')
+    )
     context = get_base_context()
-    context['orders'] = orders
+    context['orders'] = paginate_numbered(request, orders, ORDERS_PER_PAGE)
     return render(request, 'dashboard/order_history.html', context)
 
 @login_required
 def order_detail_view(request, order_id):
-    order = get_object_or_404(Order, order_id=order_id, user=request.user)
+    items = OrderItem.objects.select_related('product_offer__product').order_by('id')
+    order = get_object_or_404(
+        Order.objects.prefetch_related(Prefetch('items', queryset=items)),
+        order_id=order_id,
+        user=request.user,
+    )
     context = get_base_context()
     context['order'] = order
     return render(request, 'dashboard/order_detail.html', context)
@@ -291,8 +298,13 @@ def order_detail_view(request, order_id):
 @login_required
 def wishlist_view(request):
     context = get_base_context()
-    wishlist_items = Wishlist.objects.filter(user=request.user)
-    context['wishlist_items'] = wishlist_items
+    wishlist_items = (
+        Wishlist.objects.filter(user=request.user)
+        .select_related('product__brand')
+        .annotate(lowest_price=F('product__price_summary__min_price'))
+        .order_by('-added_at', '-id')
+    )
+    context['wishlist_items'] = paginate_numbered(request, wishlist_items, LIST_ITEMS_PER_PAGE)
     return render(request, 'dashboard/wishlist.html', context)
 
 @login_required
@@ -302,6 +314,7 @@ def add_to_wishlist_view(request, product_id):
         wishlist_item, created = Wishlist.objects.get_or_create(user=request.user, product=product)
         
         if created:
+            invalidate_header_counters(request.user.pk)
             message = 'Product added to your wishlist!'
         else:
             message = 'This product is already in your wishlist.'
@@ -317,15 +330,21 @@ def add_to_wishlist_view(request, product_id):
 
 @login_required
 def remove_from_wishlist_view(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
-    Wishlist.objects.filter(user=request.user, product=product).delete()
+    # No product lookup: a retired product must still be removable from the wishlist
+    Wishlist.objects.filter(user=request.user, product_id=product_id).delete()
+    invalidate_header_counters(request.user.pk)
     return redirect('dashboard:wishlist')
 
 @login_required
 def price_alert_view(request):
-    price_alerts = PriceAlert.objects.filter(user=request.user)
+    price_alerts = (
+        PriceAlert.objects.filter(user=request.user)
+        .select_related('product__brand')
+        .annotate(lowest_price=F('product__price_summary__min_price'))
+        .order_by('-created_at', '-id')
+    )
     context = {
-        'price_alerts': price_alerts
+        'price_alerts': paginate_numbered(request, price_alerts, LIST_ITEMS_PER_PAGE)
     }
     return render(request, 'dashboard/price_alert_list.html', context)
 
@@ -340,6 +359,7 @@ def add_price_alert_view(request, product_id):
                 product=product, 
                 defaults={'desired_price': desired_price, 'is_active': True}
             )
+            invalidate_header_counters(request.user.pk)
             return JsonResponse({'status': 'success', 'message': 'Price alert has been set!'})
         else:
             return JsonResponse({'status': 'error', 'message': 'Please provide a desired price.'}, status=400)
@@ -349,6 +369,7 @@ def add_price_alert_view(request, product_id):
 def remove_price_alert_view(request, alert_id):
     alert = get_object_or_404(PriceAlert, id=alert_id, user=request.user)
     alert.delete()
+    invalidate_header_counters(request.user.pk)
     return redirect('dashboard:price_alert_list')
 
 def faq_view(request):
@@ -372,18 +393,13 @@ def contact_view(request):
             email_body += f"Email: {from_email}\n\n"
             email_body += f"Message:\n{message}"
 
-            try:
-                send_mail(
-                    f"[Contact Form] {subject}",
-                    email_body,
-                    settings.DEFAULT_FROM_EMAIL, # This will be your gmail address
-                    [settings.EMAIL_HOST_USER], # Send to yourself
-                    fail_silently=False,
-                )
-                messages.success(request, 'Your message has been sent successfully! We will get back to you shortly.')
-                return redirect('dashboard:contact')
-            except Exception as e:
-                messages.error(request, f'An error occurred while sending your message: {e}')
+            queue_email(
+                f"[Contact Form] {subject}",
+                email_body,
+                [settings.EMAIL_HOST_USER], # Send to yourself
+            )
+            messages.success(request, 'Your message has been sent successfully! We will get back to you shortly.')
+            return redirect('dashboard:contact')
 
     else:
         form = ContactForm()
@@ -6,6 +6,7 @@ app_name = 'kit'
 urlpatterns = [
     path('', views.kit_home, name='kit_home'),
     path('category/<str:category_name>/', views.category_view, name='kit_category'),
+    path('category/<str:category_name>/more/', views.category_view, {'load_more': True}, name='kit_category_more'),
     path('add-to-kit/', views.add_to_kit, name='add_to_kit'),
     path('view/', views.view_kit, name='kit_view'),
     path('clear/', views.clear_kit, name='kit_clear'),
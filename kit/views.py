@@ -1,8 +1,11 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 import json
-from dashboard.models import Product, Brand, Cart, CartItem, ProductOffer
-from django.db.models import Min, Max
+from dashboard.models import Product, ProductOffer
+from dashboard.cart import add_offer, get_cart
+from dashboard.facets import apply_filters, compute_facets, parse_price
+from dashboard.header_counters import invalidate_header_counters
+from dashboard.pagination import paginate_request, load_more_response
 
 def kit_home(request):
     """Displays the main page for the kit builder, showing product categories."""
@@ -12,20 +15,35 @@ def kit_home(request):
     }
     return render(request, 'kit/kit.html', context)
 
-def category_view(request, category_name):
+def category_view(request, category_name, load_more=False):
     """Displays products from a selected category, with subcategory and brand filters, specifically for the kit builder."""
-    products = Product.objects.filter(category=category_name).prefetch_related('offers', 'brand')
-    subcategories = products.values('subcategory').distinct().order_by('subcategory')
-    brands = Brand.objects.filter(products__in=products).distinct().order_by('name')
-    price_stats = ProductOffer.objects.filter(product__in=products).aggregate(min_price=Min('price'), max_price=Max('price'))
+    products = Product.objects.filter(category=category_name)
+
+    selected_brands = request.GET.getlist('brand')
+    selected_subcategory = request.GET.get('subcategory')
+    selected_sort = request.GET.get('sort', 'name')
+    max_price_filter = parse_price(request.GET.get('max_price'))
+
+    filtered_products = apply_filters(products, brands=selected_brands, subcategory=selected_subcategory, max_price=max_price_filter)
+    page = paginate_request(request, filtered_products.select_related('brand', 'price_summary').prefetch_related('offers'))
+    if load_more:
+        return load_more_response(request, page, 'kit/_product_cards.html')
+
+    facets = compute_facets(products, brands=selected_brands, subcategory=selected_subcategory, max_price=max_price_filter)
+    max_price = facets['max_price'] or 100
 
     context = {
         'category_name': category_name,
-        'products': products,
-        'subcategories': subcategories,
-        'filter_brands': brands,
-        'min_price': price_stats['min_price'] or 0,
-        'max_price': price_stats['max_price'] or 100,
+        'products': page.items,
+        'next_cursor': page.next_cursor,
+        'subcategories': facets['subcategories'],
+        'filter_brands': facets['brands'],
+        'min_price': facets['min_price'] or 0,
+        'max_price': max_price,
+        'selected_brands': selected_brands,
+        'selected_subcategory': selected_subcategory,
+        'selected_max_price': max_price_filter if max_price_filter is not None else max_price,
+        'selected_sort': selected_sort,
     }
     return render(request, 'kit/category.html', context)
 
@@ -71,7 +89,10 @@ def add_to_kit(request):
 def view_kit(request):
     """Displays the items currently in the user's kit."""
     kit_items = request.session.get('kit', [])
-    total_price = sum(float(item.get('price', 0)) * item.get('quantity', 1) for item in kit_items)
+    # The kit holds copies of offers, which may have been retired since they were added
+    active_ids = set(ProductOffer.objects.filter(id__in=[item['offer_id'] for item in kit_items]).values_list('id', flat=True))
+    kit_items = [{**item, 'available': item['offer_id'] in active_ids} for item in kit_items]
+    total_price = sum(float(item.get('price', 0)) * item.get('quantity', 1) for item in kit_items if item['available'])
 
     context = {
         'kit_items': kit_items,
@@ -126,22 +147,16 @@ def add_kit_to_cart(request):
     if not kit_items:
         return redirect('kit:kit_view')
 
-    cart, _ = Cart.objects.get_or_create(user=request.user)
-    
+    cart = get_cart(request.user)
+    active_ids = set(ProductOffer.objects.filter(id__in=[item['offer_id'] for item in kit_items]).values_list('id', flat=True))
+
+    # Retired offers can no longer be bought; they stay in the kit, flagged, for the user to remove
     for item_data in kit_items:
-        offer = get_object_or_404(ProductOffer, id=item_data['offer_id'])
-        # Use get_or_create and then update quantity
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart, 
-            product_offer=offer,
-            defaults={'quantity': item_data.get('quantity', 1)}
-        )
-        if not created:
-            cart_item.quantity += item_data.get('quantity', 1)
-            cart_item.save()
+        if item_data['offer_id'] in active_ids:
+            add_offer(cart, item_data['offer_id'], item_data.get('quantity', 1))
+    invalidate_header_counters(request.user.pk)
 
-    if 'kit' in request.session:
-        del request.session['kit']
-        request.session.modified = True
+    request.session['kit'] = [item for item in kit_items if item['offer_id'] not in active_ids]
+    request.session.modified = True
 
     return redirect('dashboard:cart_view')
@@ -0,0 +1,118 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left
+
+from django.db.models import Count, Q
+
+from dashboard.catalog_cache import VersionedValue
+from dashboard.models import Brand, Product, Wishlist, PriceAlert, CartItem
+
+SUGGESTION_LIMIT = 5
+PRECOMPUTED_PREFIX_LENGTH = 3
+MAX_SCAN = 5000
+
+_SEPARATOR_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text):
+    """Case-folds, strips accents and apostrophes, and collapses everything else to single spaces."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace("'", '').replace('’', '')
+    return _SEPARATOR_RE.sub(' ', text).strip()
+
+
+class PrefixIndex:
+    """
+    A sorted-array prefix index over weighted entries.
+
+    Every word suffix of an entry's normalized text is a key, so "lip" finds
+    "MAC Silk Lipstick". Top matches for short prefixes, which have the most
+    candidates, are precomputed; longer prefixes scan a bounded key range.
+    """
+
+    def __init__(self, entries, limit=SUGGESTION_LIMIT):
+        # entries: iterable of (text, weight, payload)
+        self.limit = limit
+        self.payloads = []
+        self.weights = []
+        keyed = []
+        for text, weight, payload in entries:
+            entry_id = len(self.payloads)
+            self.payloads.append(payload)
+            self.weights.append(weight)
+            words = normalize(text).split()
+            for i in range(len(words)):
+                keyed.append((' '.join(words[i:]), entry_id))
+        keyed.sort()
+        self.keys = [key for key, _ in keyed]
+        self.entry_ids = [entry_id for _, entry_id in keyed]
+        self.top = self._precompute_top()
+
+    def _rank(self, entry_ids):
+        return heapq.nlargest(self.limit, set(entry_ids), key=lambda e: (self.weights[e], -e))
+
+    def _precompute_top(self):
+        candidates = {}
+        for key, entry_id in zip(self.keys, self.entry_ids):
+            for length in range(1, min(len(key), PRECOMPUTED_PREFIX_LENGTH) + 1):
+                candidates.setdefault(key[:length], set()).add(entry_id)
+        return {prefix: self._rank(ids) for prefix, ids in candidates.items()}
+
+    def search(self, query):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        if len(prefix) <= PRECOMPUTED_PREFIX_LENGTH:
+            entry_ids = self.top.get(prefix, [])
+        else:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + '\uffff', lo, min(lo + MAX_SCAN, len(self.keys)))
+            entry_ids = self._rank(self.entry_ids[lo:hi])
+        return [self.payloads[e] for e in entry_ids]
+
+    def __len__(self):
+        return len(self.payloads)
+
+
+def _product_demand():
+    demand = {}
+    for model in (Wishlist, PriceAlert):
+        for row in model.objects.values('product_id').annotate(n=Count('id')).order_by():
+            demand[row['product_id']] = demand.get(row['product_id'], 0) + row['n']
+    for row in CartItem.objects.values('product_offer__product_id').annotate(n=Count('id')).order_by():
+        product_id = row['product_offer__product_id']
+        demand[product_id] = demand.get(product_id, 0) + row['n']
+    return demand
+
+
+def build_indexes():
+    """Builds the brand and product indexes, weighting brands by size and products by shopper demand."""
+    brands = Brand.objects.annotate(num_products=Count('products', filter=Q(products__is_active=True))).filter(num_products__gt=0).values_list('name', 'num_products')
+    brand_index = PrefixIndex((name, count, name) for name, count in brands)
+
+    demand = _product_demand()
+    products = Product.objects.values_list('id', 'name').iterator()
+    product_index = PrefixIndex(
+        (name, demand.get(product_id, 0), {'id': product_id, 'name': name})
+        for product_id, name in products
+    )
+    return brand_index, product_index
+
+
+class Autocomplete:
+    """Holds this worker's indexes and rebuilds them lazily when the catalog version changes."""
+
+    def __init__(self):
+        self._indexes = VersionedValue(build_indexes)
+
+    def suggest(self, query):
+        brand_index, product_index = self._indexes.get()
+        return {
+            'brands': brand_index.search(query),
+            'products': product_index.search(query),
+        }
+
+
+autocomplete = Autocomplete()
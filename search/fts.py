@@ -0,0 +1,143 @@
+import re
+
+from django.db import connection, transaction
+
+from dashboard.models import Product
+from dashboard.pagination import KeysetPage, decode_cursor, encode_cursor
+
+FTS_TABLE = 'search_product_fts'
+INDEX_BATCH_SIZE = 1000
+
+# Relative BM25 weights for the indexed columns, in table column order.
+COLUMN_WEIGHTS = (10.0, 8.0, 3.0, 3.0, 1.0)
+
+INSERT_SQL = f'INSERT INTO {FTS_TABLE} (rowid, name, brand, category, subcategory, description) VALUES (%s, %s, %s, %s, %s, %s)'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_available = None
+
+
+def create_index_sql():
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "name, brand, category, subcategory, description, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+
+
+def is_available():
+    """Returns True when the database is SQLite with FTS5 and the index table exists."""
+    global _available
+    if _available is None:
+        _available = connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+    return _available
+
+
+def build_match_expression(query):
+    """
+    Turns free text into an FTS5 MATCH expression.
+
+    Every token must match, and every token is treated as a prefix so results
+    appear while the shopper is still typing. Tokens are quoted so FTS5
+    operators in user input are matched literally.
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _index_rows(products):
+    return [
+        (p.id, p.name, p.brand.name, p.category or '', p.subcategory or '', p.description or '')
+        for p in products
+    ]
+
+
+def index_products(product_ids):
+    """(Re)indexes the given products, dropping any that no longer exist."""
+    if not is_available():
+        return
+    product_ids = list(set(product_ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(product_ids), INDEX_BATCH_SIZE):
+            batch = product_ids[start:start + INDEX_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', batch)
+            products = Product.objects.filter(id__in=batch).select_related('brand')
+            cursor.executemany(INSERT_SQL, _index_rows(products))
+
+
+def remove_products(product_ids):
+    if not is_available() or not product_ids:
+        return
+    product_ids = list(product_ids)
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', product_ids)
+
+
+def rebuild_index():
+    """Recreates the whole index from the product table. Returns the number of products indexed."""
+    global _available
+    if connection.vendor != 'sqlite':
+        return 0
+    indexed = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        cursor.execute(create_index_sql())
+        products = Product.objects.select_related('brand').order_by('id').iterator(chunk_size=INDEX_BATCH_SIZE)
+        batch = []
+        for product in products:
+            batch.append(product)
+            if len(batch) >= INDEX_BATCH_SIZE:
+                cursor.executemany(INSERT_SQL, _index_rows(batch))
+                indexed += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(INSERT_SQL, _index_rows(batch))
+            indexed += len(batch)
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    _available = True
+    return indexed
+
+
+def matching_ids_sql(match):
+    """Returns SQL and params selecting the ids of every product matching `match`, for use in `id__in`."""
+    return f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+
+
+def search_page(match, cursor=None, page_size=24, queryset=None):
+    """
+    Returns one page of products matching `match`, best BM25 rank first.
+
+    Pages are keyset-paginated on (rank, rowid) so deep pages cost the same
+    as the first one.
+    """
+    weights = ', '.join(str(w) for w in COLUMN_WEIGHTS)
+    sql = (
+        f'SELECT rowid, score FROM ('
+        f'SELECT rowid, bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        f')'
+    )
+    params = [match]
+    position = decode_cursor(cursor, float)
+    if position is not None:
+        score, pk = position
+        sql += ' WHERE score > %s OR (score = %s AND rowid > %s)'
+        params += [score, score, pk]
+    sql += ' ORDER BY score, rowid LIMIT %s'
+    params.append(page_size + 1)
+
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        ranked = db_cursor.fetchall()
+
+    next_cursor = None
+    if len(ranked) > page_size:
+        ranked = ranked[:page_size]
+        next_cursor = encode_cursor(ranked[-1][1], ranked[-1][0])
+
+    if queryset is None:
+        queryset = Product.objects.all()
+    products = queryset.in_bulk([pk for pk, _ in ranked])
+    items = [products[pk] for pk, _ in ranked if pk in products]
+    return KeysetPage(items, next_cursor, 'relevance')
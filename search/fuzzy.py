@@ -0,0 +1,125 @@
+import re
+
+from dashboard.catalog_cache import VersionedValue
+from dashboard.models import Brand, Product
+
+MAX_CANDIDATES = 50
+MIN_WORD_LENGTH = 3
+
+_WORD_RE = re.compile(r"[\w'’]+", re.UNICODE)
+
+
+def compact(word):
+    """Reduces a word to lowercase letters and digits, like dashboard.views.normalize_brand_name."""
+    return re.sub(r'[^a-z0-9]', '', word.lower())
+
+
+def max_distance(length):
+    return 1 if length <= 5 else 2
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_levenshtein(a, b, limit):
+    """Returns the edit distance between a and b, or limit + 1 once it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cost = previous[j - 1] + (ca != cb)
+            value = min(previous[j] + 1, current[j - 1] + 1, cost)
+            current.append(value)
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyMatcher:
+    """
+    Corrects misspelled query words against the catalog vocabulary.
+
+    Vocabulary words are compacted (so "L'Oreal" and "loreal" share a key) and
+    indexed by trigram. A query word only gets a Levenshtein check against
+    the few words sharing enough trigrams with it, never the whole vocabulary.
+    """
+
+    def __init__(self, phrases):
+        self.surface = {}
+        self.frequency = {}
+        self.postings = {}
+        for phrase in phrases:
+            for word in _WORD_RE.findall(phrase):
+                key = compact(word)
+                if len(key) < MIN_WORD_LENGTH:
+                    continue
+                self.frequency[key] = self.frequency.get(key, 0) + 1
+                if key not in self.surface:
+                    self.surface[key] = word
+                    for gram in trigrams(key):
+                        self.postings.setdefault(gram, []).append(key)
+
+    def correct_word(self, word):
+        """Returns the best vocabulary word for `word`, or None when nothing is close enough."""
+        key = compact(word)
+        if len(key) < MIN_WORD_LENGTH:
+            return None
+        if key in self.surface:
+            return self.surface[key]
+
+        limit = max_distance(len(key))
+        grams = trigrams(key)
+        shared = {}
+        for gram in grams:
+            for candidate in self.postings.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        # Each edit can destroy at most three trigrams.
+        min_shared = max(1, len(grams) - 3 * limit)
+        candidates = sorted(
+            (c for c, n in shared.items() if n >= min_shared and abs(len(c) - len(key)) <= limit),
+            key=lambda c: -shared[c],
+        )[:MAX_CANDIDATES]
+
+        best = None
+        for candidate in candidates:
+            distance = bounded_levenshtein(key, candidate, limit)
+            if distance <= limit:
+                rank = (distance, -self.frequency[candidate], candidate)
+                if best is None or rank < best[0]:
+                    best = (rank, candidate)
+        return self.surface[best[1]] if best else None
+
+    def correct(self, query):
+        """Returns `query` with misspelled words replaced, or None if nothing changed."""
+        changed = False
+        words = []
+        for word in query.split():
+            corrected = self.correct_word(word)
+            if corrected and corrected.lower() != word.lower():
+                words.append(corrected)
+                changed = True
+            else:
+                words.append(word)
+        return ' '.join(words) if changed else None
+
+
+def build_matcher():
+    brand_names = list(Brand.objects.values_list('name', flat=True))
+    product_names = Product.objects.values_list('name', flat=True).iterator()
+    return FuzzyMatcher(brand_names + list(product_names))
+
+
+_matcher = VersionedValue(build_matcher)
+
+
+def correct_query(query):
+    """Returns a spelling-corrected version of `query`, or None if it already matches the catalog."""
+    return _matcher.get().correct(query)
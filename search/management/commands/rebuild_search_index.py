@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from search.fts import rebuild_index
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text product search index from the product catalog.'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Rebuilding product search index...')
+        indexed = rebuild_index()
+        if not indexed:
+            self.stdout.write(self.style.WARNING('No products indexed. Full-text search needs SQLite with FTS5.'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} products.'))
@@ -0,0 +1,34 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from search.result_cache import cached_search, cached_suggestions, normalize_query
+
+class Command(BaseCommand):
+    help = (
+        'Precomputes search results and suggestions for the most frequent queries in a query log '
+        '(one query per line, as written by the "search.queries" logger). '
+        'Warmed entries are only visible to web workers when CACHES uses a shared backend.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SEARCH_QUERY_LOG, help='Path to the query log. Defaults to SEARCH_QUERY_LOG.')
+        parser.add_argument('--top', type=int, default=200, help='Number of distinct queries to warm.')
+
+    def handle(self, *args, **options):
+        counts = Counter()
+        try:
+            with open(options['log'], encoding='utf-8', errors='replace') as log:
+                for line in log:
+                    query = normalize_query(line)
+                    if query:
+                        counts[query] += 1
+        except OSError as e:
+            raise CommandError(f'Could not read query log: {e}')
+
+        popular = counts.most_common(options['top'])
+        self.stdout.write(f'Warming {len(popular)} of {len(counts)} distinct queries...')
+        for query, _ in popular:
+            cached_search(query)
+            cached_suggestions(query)
+        self.stdout.write(self.style.SUCCESS(f'Warmed {len(popular)} queries.'))
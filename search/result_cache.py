@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import re
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from dashboard.catalog_cache import LRUCache, get_catalog_version
+from dashboard.models import Product
+from dashboard.pagination import DEFAULT_PAGE_SIZE, KeysetPage, paginate
+from . import fts
+from .autocomplete import autocomplete, normalize
+from .fuzzy import correct_query
+
+SEARCH_CACHE_TIMEOUT = 60 * 5
+LOCAL_CACHE_SIZE = 5000
+FUZZY_MIN_RESULTS = 3
+DEFAULT_SEARCH_SORT = 'relevance'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+query_log = logging.getLogger('search.queries')
+
+
+def normalize_query(query):
+    """
+    Case-folds a query and collapses whitespace and punctuation to single spaces.
+
+    This mirrors how fts.build_match_expression tokenizes queries, so every
+    spelling that normalizes to the same text matches the same products.
+    """
+    return ' '.join(_TOKEN_RE.findall(query.lower()))
+
+
+class QueryResultCache:
+    """
+    Caches search results keyed by normalized query and catalog version.
+
+    Entries live in a process-local LRU backed by the shared Django cache, so
+    entries written by the warm_search_cache command reach every worker when
+    a shared cache backend is configured. Bumping the catalog version makes
+    every existing entry unreachable; the TTL bounds how stale offer-driven
+    orderings such as price sorts can get.
+    """
+
+    def __init__(self, namespace, maxsize=LOCAL_CACHE_SIZE, timeout=SEARCH_CACHE_TIMEOUT):
+        self.namespace = namespace
+        self.timeout = timeout
+        self._local = LRUCache(maxsize=maxsize, timeout=timeout)
+        self.shared_hits = 0
+
+    def make_key(self, normalized, *parts):
+        raw = '|'.join([normalized] + [str(part) for part in parts])
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'search:{self.namespace}:v{get_catalog_version()}:{digest}'
+
+    def get(self, key):
+        value = self._local.get(key)
+        if value is None:
+            value = cache.get(key)
+            if value is not None:
+                self.shared_hits += 1
+                self._local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self._local.set(key, value)
+        cache.set(key, value, self.timeout)
+
+    def stats(self):
+        stats = self._local.stats()
+        stats['shared_hits'] = self.shared_hits
+        return stats
+
+
+result_cache = QueryResultCache('results')
+suggestion_cache = QueryResultCache('suggestions')
+
+
+def _product_queryset():
+    return Product.objects.select_related('brand', 'price_summary').prefetch_related('offers')
+
+
+def search_page(query, sort=DEFAULT_SEARCH_SORT, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Returns one page of products matching `query`, without caching."""
+    products = _product_queryset()
+
+    if fts.is_available():
+        match = fts.build_match_expression(query)
+        if not match:
+            return KeysetPage([], None, sort)
+        if sort == 'relevance':
+            return fts.search_page(match, cursor=cursor, page_size=page_size, queryset=products)
+        return paginate(products.filter(id__in=RawSQL(*fts.matching_ids_sql(match))), sort, cursor, page_size)
+
+    products = products.filter(Q(name__icontains=query) | Q(brand__name__icontains=query))
+    return paginate(products, sort, cursor, page_size)
+
+
+def _search_with_correction(query, sort, cursor, page_size):
+    page = search_page(query, sort, cursor, page_size)
+
+    # Fall back to a spelling-corrected query when the exact one finds too little
+    corrected_query = None
+    if not cursor and len(page) < FUZZY_MIN_RESULTS:
+        corrected_query = correct_query(query)
+        if corrected_query:
+            corrected_page = search_page(corrected_query, sort, cursor, page_size)
+            if len(corrected_page) > len(page):
+                page = corrected_page
+            else:
+                corrected_query = None
+    return page, corrected_query
+
+
+def cached_search(query, sort=DEFAULT_SEARCH_SORT, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns (page, corrected_query) for `query`, served from the result cache when possible.
+
+    Only the ordered product ids are cached; a hit costs one primary-key
+    lookup instead of the full-text query and spelling correction.
+    """
+    normalized = normalize_query(query)
+    if not cursor:
+        query_log.info(normalized)
+
+    key = result_cache.make_key(normalized, sort, cursor or '', page_size)
+    entry = result_cache.get(key)
+    if entry is None:
+        page, corrected_query = _search_with_correction(query, sort, cursor, page_size)
+        result_cache.set(key, {
+            'ids': [product.id for product in page.items],
+            'next_cursor': page.next_cursor,
+            'corrected_query': corrected_query,
+        })
+        return page, corrected_query
+
+    products = _product_queryset().in_bulk(entry['ids'])
+    items = [products[pk] for pk in entry['ids'] if pk in products]
+    return KeysetPage(items, entry['next_cursor'], sort), entry['corrected_query']
+
+
+def cached_suggestions(query):
+    """Returns autocomplete suggestions for `query`, retrying with a spelling correction when nothing matches."""
+    normalized = normalize(query)
+    key = suggestion_cache.make_key(normalized)
+    suggestions = suggestion_cache.get(key)
+    if suggestions is None:
+        suggestions = autocomplete.suggest(normalized)
+        if not suggestions['brands'] and not suggestions['products']:
+            corrected_query = correct_query(normalized)
+            if corrected_query:
+                suggestions = autocomplete.suggest(corrected_query)
+        suggestion_cache.set(key, suggestions)
+    return suggestions
+
+
+def stats():
+    return {
+        'results': result_cache.stats(),
+        'suggestions': suggestion_cache.stats(),
+    }
@@ -5,5 +5,7 @@ app_name = 'search'
 
 urlpatterns = [
     path('', views.search_results, name='search_results'),
+    path('more/', views.search_results, {'load_more': True}, name='search_results_more'),
     path('suggestions/', views.search_suggestions, name='search_suggestions'),
+    path('cache-stats/', views.search_cache_stats, name='search_cache_stats'),
 ]
@@ -1,17 +1,27 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
 from django.http import JsonResponse
-from dashboard.models import Product, Brand
-from django.db.models import Q
+from dashboard.pagination import parse_page_size, load_more_response
+from . import result_cache
 
-def search_results(request):
+def search_results(request, load_more=False):
     query = request.GET.get('q', '')
-    products = Product.objects.filter(
-        Q(name__icontains=query) | Q(brand__name__icontains=query)
-    ).prefetch_related('offers', 'brand')
-    
+    page, corrected_query = result_cache.cached_search(
+        query,
+        sort=request.GET.get('sort') or result_cache.DEFAULT_SEARCH_SORT,
+        cursor=request.GET.get('cursor'),
+        page_size=parse_page_size(request.GET.get('page_size')),
+    )
+
+    if load_more:
+        return load_more_response(request, page, 'search/_product_results.html')
+
     context = {
         'query': query,
-        'products': products,
+        'corrected_query': corrected_query,
+        'search_query': corrected_query or query,
+        'products': page.items,
+        'next_cursor': page.next_cursor,
     }
     return render(request, 'search/search_results.html', context)
 
@@ -21,10 +31,8 @@ def search_suggestions(request):
     if not query:
         return JsonResponse({'brands': [], 'products': []})
 
-    brands = Brand.objects.filter(name__icontains=query).values_list('name', flat=True)[:5]
-    products = Product.objects.filter(name__icontains=query).values('id', 'name')[:5]
+    return JsonResponse(result_cache.cached_suggestions(query))
 
-    return JsonResponse({
-        'brands': list(brands),
-        'products': list(products),
-    })
+@staff_member_required
+def search_cache_stats(request):
+    return JsonResponse(result_cache.stats())